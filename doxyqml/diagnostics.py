@@ -0,0 +1,56 @@
+"""
+Error locations and diagnostics collected when converting QML files.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+
+Diagnostic = namedtuple("Diagnostic", ["path", "line", "column", "token", "message", "source_line"])
+
+
+class LineTable(object):
+    """
+    Maps offsets in a text to line and column numbers. The offsets of line
+    starts are computed once, each lookup is then a bisection.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.starts = [0]
+        idx = text.find("\n")
+        while idx != -1:
+            self.starts.append(idx + 1)
+            idx = text.find("\n", idx + 1)
+
+    def coord(self, idx):
+        """Returns the 1-based (line, column) of offset `idx`"""
+        row = bisect_right(self.starts, idx)
+        return row, idx - self.starts[row - 1] + 1
+
+    def line(self, row):
+        """Returns the text of 1-based line `row`, without its newline"""
+        start = self.starts[row - 1]
+        if row < len(self.starts):
+            return self.text[start:self.starts[row] - 1]
+        return self.text[start:]
+
+
+def create_diagnostic(path, line_table, idx, message, token=None):
+    row, col = line_table.coord(idx)
+    return Diagnostic(path, row, col, token, message, line_table.line(row))
+
+
+def format_diagnostic(diagnostic, compact=False):
+    """
+    Returns the location and message of `diagnostic`, followed by its source
+    line unless `compact` is True.
+    """
+    lst = ["%s:%d:%d: %s" % (diagnostic.path, diagnostic.line, diagnostic.column, diagnostic.message)]
+    if diagnostic.source_line is not None and not compact:
+        lst.append("    " + diagnostic.source_line)
+        lst.append("    " + "-" * (diagnostic.column - 1) + "^")
+    return "\n".join(lst)
+
+
+def format_summary(diagnostics, file_count):
+    failed_paths = set(x.path for x in diagnostics)
+    return "%d error(s) in %d of %d file(s)" % (len(diagnostics), len(failed_paths), file_count)
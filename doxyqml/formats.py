@@ -0,0 +1,119 @@
+"""
+Output formats a parsed QmlClass can be rendered to.
+
+All renderers take the same QmlClass, so one parse can feed as many outputs
+as needed.
+"""
+from collections import namedtuple
+import json
+
+from doxyqml.qmlclass import QmlClass
+
+
+# `source_hint` returns the text naming the QML source of a rendering in
+# aggregated outputs, it is None for formats which cannot be aggregated
+OutputFormat = namedtuple("OutputFormat", ["name", "extension", "render", "source_hint"])
+
+
+def render_cpp(qml_class):
+    """Renders the Doxygen pseudo-C++ for `qml_class`"""
+    return str(qml_class)
+
+
+def cpp_source_hint(path):
+    # Only a marker for readers: Doxygen does not attribute the following
+    # class to `path` for it
+    return '#line 1 "%s"' % path.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _describe_args(args, types):
+    return [{
+        "name": x.name,
+        "type": type,
+        "default_value": x.default_value,
+        "spread": x.spread,
+    } for x, type in zip(args, types)]
+
+
+def _describe_property(prop):
+    doc, type = prop.process_doc()
+    return {
+        "name": prop.name,
+        "type": type,
+        "doc": doc,
+        "is_default": prop.is_default,
+        "is_readonly": prop.is_readonly,
+    }
+
+
+def _describe_signal(signal):
+    doc, arg_types = signal.process_doc()
+    return {
+        "name": signal.name,
+        "doc": doc,
+        "args": _describe_args(signal.args, arg_types),
+    }
+
+
+def _describe_function(function):
+    doc, type, arg_types = function.process_doc()
+    return {
+        "name": function.name,
+        "type": type,
+        "doc": doc,
+        "args": _describe_args(function.args, arg_types),
+    }
+
+
+def _describe_components(component, lst):
+    # Mirrors QmlComponent._export_content(): components with an id are
+    # flattened into one list
+    for element in component.get_components():
+        component_id = element.get_component_id()
+        if component_id:
+            lst.append({
+                "id": component_id,
+                "type": element.class_name,
+                "doc": element.comment,
+            })
+        _describe_components(element, lst)
+    return lst
+
+
+def describe_class(qml_class):
+    """Returns a JSON-compatible description of `qml_class`"""
+    return {
+        "name": qml_class.name,
+        "class_name": qml_class.class_name,
+        "namespaces": qml_class.namespaces,
+        "base_name": qml_class.get_resolved_base_name() if qml_class.base_name else "",
+        "module": qml_class.modulename,
+        "version": qml_class.version,
+        "imports": qml_class.imports,
+        "header_comments": [str(x) for x in qml_class.header_comments],
+        "properties": [_describe_property(x) for x in qml_class.get_properties()],
+        "signals": [_describe_signal(x) for x in qml_class.get_signals()],
+        "functions": [_describe_function(x) for x in qml_class.get_functions()],
+        "enums": [{
+            "name": x.name,
+            "doc": x.doc,
+            "enumerators": [{
+                "name": e.name,
+                "initializer": e.initializer,
+                "doc": e.doc,
+            } for e in x.enumerators],
+        } for x in qml_class.get_enums()],
+        "components": _describe_components(qml_class, []),
+        "inline_components": [describe_class(x) for x in qml_class.elements if isinstance(x, QmlClass)],
+    }
+
+
+def render_json(qml_class):
+    """Renders a JSON description of `qml_class`"""
+    return json.dumps(describe_class(qml_class), indent=2)
+
+
+FORMATS = {
+    "cpp": OutputFormat("cpp", ".cpp", render_cpp, cpp_source_hint),
+    "json": OutputFormat("json", ".json", render_json, None),
+}
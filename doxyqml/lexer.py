@@ -1,5 +1,8 @@
-from collections import namedtuple
+from collections import Counter, namedtuple
 import re
+import sys
+
+from doxyqml import tracing
 
 
 COMMENT = "comment"
@@ -19,6 +22,10 @@ ICOMPONENT = "inline_component"
 ATTRIBUTE = "attribute"
 ELLIPSES = "ellipses"
 
+# Tokens holding identifiers and type names. Their values are interned: the
+# same names come back in every file and end up in the parsed models.
+INTERNED_TOKEN_TYPES = frozenset([ELEMENT, COMPONENT, ICOMPONENT, ATTRIBUTE, KEYWORD])
+
 # not a doxy comment
 PLAIN_COMMENT_RX = re.compile("/[/*][^/!*]")
 
@@ -40,55 +47,217 @@ class Tokenizer(object):
     def __init__(self, token_type, rx):
         self.token_type = token_type
         self.rx = rx
+        # The token is the first group of `rx` if it has one, the whole match
+        # otherwise
+        self.group = 1 if rx.groups > 0 else 0
+
+    def scan(self, lexer, match):
+        """
+        Called when `rx` matched at the lexer position. Returns a (value, end)
+        tuple for the token, or None if there is no token after all.
+        """
+        return match.group(self.group), match.end(self.group)
 
     def __call__(self, lexer, matched_str):
         lexer.append_token(self.token_type, matched_str)
 
+    def describe(self):
+        return "%s %s" % (self.token_type, self.rx.pattern)
+
+
+# The following tokenizers only use `rx` to match the start of a string or a
+# comment, then scan the rest with str.find() and character class searches
+# instead of backtracking regular expressions. They run in linear time: when
+# a scan fails because a string or comment is not terminated, the lexer
+# remembers the position up to which any other scan of the same kind fails
+# too, so that the rest of the text is not scanned again for each following
+# quote or comment start.
+
+
+class BlockCommentTokenizer(Tokenizer):
+    """A `/* ... */` comment whose start matches `rx`"""
+    def scan(self, lexer, match):
+        start = match.end()
+        # No "*/" after this position
+        limit = lexer.scan_limits.get("*/")
+        if limit is not None and start >= limit:
+            return None
+        end = lexer.text.find("*/", start)
+        if end == -1:
+            lexer.scan_limits["*/"] = start
+            return None
+        end += 2
+        return lexer.text[match.start():end], end
+
+
+class LineCommentTokenizer(Tokenizer):
+    """
+    A `//` comment, continued by the following lines if they also start with
+    one of `prefixes`.
+    """
+    line_indent_rx = re.compile(r"[ \t]*")
+
+    def __init__(self, token_type, prefixes):
+        Tokenizer.__init__(self, token_type, re.compile("|".join(re.escape(x) for x in prefixes)))
+        self.prefixes = tuple(prefixes)
+
+    def scan(self, lexer, match):
+        text = lexer.text
+        idx = match.start()
+        length = len(text)
+        end = text.find("\n", idx)
+        while end != -1:
+            next_start = self.line_indent_rx.match(text, end + 1).end()
+            if not text.startswith(self.prefixes, next_start):
+                return text[idx:end], end
+            end = text.find("\n", next_start)
+        return text[idx:], length
+
+
+class StringTokenizer(Tokenizer):
+    """
+    A string between double quotes, single quotes or backticks. A backslash
+    escapes the next character, except a newline.
+    """
+    QUOTES = "\"'`"
+
+    def __init__(self, token_type):
+        Tokenizer.__init__(self, token_type, re.compile("[%s]" % self.QUOTES))
+        # Finds the next quote or backslash for each quote
+        self.special_rxs = dict((x, re.compile(r"[%s\\]" % x)) for x in self.QUOTES)
+
+    def scan(self, lexer, match):
+        text = lexer.text
+        idx = match.start()
+        quote = match.group(0)
+        special_rx = self.special_rxs[quote]
+        # Any string starting before a failed scan position fails too
+        if idx < lexer.scan_limits.get(quote, -1):
+            return None
+        length = len(text)
+        pos = idx + 1
+        while True:
+            match = special_rx.search(text, pos)
+            if match is None:
+                failed_at = length
+                break
+            pos = match.start()
+            if text[pos] == quote:
+                return text[idx:pos + 1], pos + 1
+            if pos + 1 == length or text[pos + 1] == "\n":
+                failed_at = pos
+                break
+            pos += 2
+        lexer.scan_limits[quote] = failed_at
+        return None
+
+
+# Tokenizers keep no state, the scan state lives in the Lexer. They are
+# shared by all lexers, including lexers running in other threads.
+
+# Tokens that start at the first non-whitespace character in a line
+NEWLINE_TOKENIZERS = (
+    Tokenizer(ICOMPONENT, re.compile(r"component ([-\w\.]+)\s*")),  # an inline component
+    Tokenizer(COMPONENT, re.compile(r"([-\w\.]+)\s*{")),  # a component
+    Tokenizer(ATTRIBUTE, re.compile(r"([-\w\.]+)\s*:")),  # an attribute
+)
+
+TOKENIZERS = (
+    BlockCommentTokenizer(ICOMMENT, re.compile(r"/\*[!*]<")),
+    LineCommentTokenizer(ICOMMENT, ["///<", "//!<"]),
+    BlockCommentTokenizer(COMMENT, re.compile(r"/\*")),
+    LineCommentTokenizer(COMMENT, ["//"]),
+    # A double/single quote or backtick, then either:
+    # - anything but a matching quote or a backslash
+    # - an escaped char (\n, \t...)
+    # then a matching quote
+    StringTokenizer(STRING),
+    Tokenizer(BLOCK_START, re.compile("(?<!')\{(?!')")),
+    Tokenizer(BLOCK_END, re.compile("(?<!')\}(?!')")),
+    Tokenizer(ARRAY_START, re.compile("\[")),
+    Tokenizer(ARRAY_END, re.compile("\]")),
+    Tokenizer(IMPORT, re.compile(r"import\s+.*")),
+    Tokenizer(PRAGMA, re.compile(r"pragma\s+\w.*")),
+    Tokenizer(KEYWORD, re.compile(r"(default\s+property|property|readonly\s+property|signal|enum)\s+")),
+    Tokenizer(KEYWORD, re.compile(r"(function)\s+[^(]")),  # a named function
+    Tokenizer(ELLIPSES, re.compile(r"\.\.\.")),
+    Tokenizer(ELEMENT, re.compile(r"\w[\w.<>]*")),
+    Tokenizer(CHAR, re.compile(".")),
+)
+
+
+class LexerStats(object):
+    """
+    Counters filled by the lexers this is passed to, to find out which
+    tokenizers are tried for nothing. For each tokenizer:
+    - `tried`: times its regular expression was tried,
+    - `matched`: times it matched,
+    - `accepted`: times the tokenizer produced a token. Only scanning
+      tokenizers can match without producing a token.
+    For each token type, `token_counts` and `token_chars` hold the number of
+    tokens produced by the tokenizers, and the number of characters of text
+    they cover.
+
+    An instance can be shared by many lexers, but not by lexers running in
+    different threads.
+    """
+    def __init__(self):
+        self.file_count = 0
+        self.tried = Counter()
+        self.matched = Counter()
+        self.accepted = Counter()
+        self.token_counts = Counter()
+        self.token_chars = Counter()
+
+    def format(self):
+        lst = ["%d file(s)" % self.file_count,
+               "%10s %10s %10s  %s" % ("tried", "matched", "accepted", "tokenizer")]
+        for tokenizer, tried in self.tried.most_common():
+            lst.append("%10d %10d %10d  %s" % (
+                tried, self.matched[tokenizer], self.accepted[tokenizer], tokenizer.describe()))
+        lst.append("%10s %10s  %s" % ("tokens", "chars", "token type"))
+        for token_type, count in self.token_counts.most_common():
+            lst.append("%10d %10d  %s" % (count, self.token_chars[token_type], token_type))
+        return "\n".join(lst)
+
 
 class Lexer(object):
-    def __init__(self, text):
-        # Tokens that start at the first non-whitespace character in a line
-        self.tokenizers_newline = [
-            Tokenizer(ICOMPONENT, re.compile(r"component ([-\w\.]+)\s*")),  # an inline component
-            Tokenizer(COMPONENT, re.compile(r"([-\w\.]+)\s*{")),  # a component
-            Tokenizer(ATTRIBUTE, re.compile(r"([-\w\.]+)\s*:")),  # an attribute
-            ]
-
-        self.tokenizers = [
-            Tokenizer(ICOMMENT, re.compile(r"/\*[!*]<.*?\*/", re.DOTALL)),
-            Tokenizer(ICOMMENT, re.compile(r"//[/!]<[^\n]*(?:\n[ \t]*//[/!]<[^\n]*)*")),
-            Tokenizer(COMMENT, re.compile(r"/\*.*?\*/", re.DOTALL)),
-            Tokenizer(COMMENT, re.compile(r"//[^\n]*(?:\n[ \t]*//[^\n]*)*")),
-            # A double/single quote or backtick, then either:
-            # - anything but a matching quote or a backslash
-            # - an escaped char (\n, \t...)
-            # then a matching quote
-            Tokenizer(STRING, re.compile(r'("([^\\"]|(\\.))*"|\'([^\\\']|(\\.))*\'|`([^\\`]|(\\.))*`)')),
-            Tokenizer(BLOCK_START, re.compile("(?<!')\{(?!')")),
-            Tokenizer(BLOCK_END, re.compile("(?<!')\}(?!')")),
-            Tokenizer(ARRAY_START, re.compile("\[")),
-            Tokenizer(ARRAY_END, re.compile("\]")),
-            Tokenizer(IMPORT, re.compile(r"import\s+.*")),
-            Tokenizer(PRAGMA, re.compile(r"pragma\s+\w.*")),
-            Tokenizer(KEYWORD, re.compile(r"(default\s+property|property|readonly\s+property|signal|enum)\s+")),
-            Tokenizer(KEYWORD, re.compile(r"(function)\s+[^(]")),  # a named function
-            Tokenizer(ELLIPSES, re.compile(r"\.\.\.")),
-            Tokenizer(ELEMENT, re.compile(r"\w[\w.<>]*")),
-            Tokenizer(CHAR, re.compile(".")),
-            ]
+    def __init__(self, text, stats=None):
+        self.tokenizers_newline = NEWLINE_TOKENIZERS
+        self.tokenizers = TOKENIZERS
+        # Counters are only updated if a LexerStats is given, by another
+        # tokenizer loop, so that the usual one does not pay for them
+        self.stats = stats
         self.text = text.replace('\\\n', '\n')
         self.idx = 0
         self.column = 0
         self.newline = False
         self.tokens = []
+        # Positions used by the scanning tokenizers to avoid rescanning text
+        self.scan_limits = {}
 
     def tokenize(self):
+        span = tracing.start(tracing.TOKENIZE)
+        try:
+            self.scan_tokens()
+        finally:
+            tracing.finish(span, len(self.text), len(self.tokens))
+        span = tracing.start(tracing.FIXUP_TOKENS)
+        self.fixup_tokens()
+        tracing.finish(span, len(self.text), len(self.tokens))
+
+    def scan_tokens(self):
+        """Fills `self.tokens`, without the fixups of fixup_tokens()"""
+        if self.stats is None:
+            apply_tokenizers = self.apply_tokenizers
+        else:
+            self.stats.file_count += 1
+            apply_tokenizers = self.apply_tokenizers_counting
         while True:
             self.advance()
             if self.idx == len(self.text):
                 break
-            self.apply_tokenizers()
-        self.fixup_tokens()
+            apply_tokenizers()
 
     def advance(self):
         self.newline = False
@@ -115,13 +284,10 @@ class Lexer(object):
                 if not match:
                     continue
 
-                if len(match.groups()) > 0:
-                    tokenizer(self, match.group(1))
-                    self.set_position(match.end(1))
-                    return
-                else:
-                    tokenizer(self, match.group(0))
-                    self.set_position(match.end(0))
+                result = tokenizer.scan(self, match)
+                if result is not None:
+                    tokenizer(self, result[0])
+                    self.set_position(result[1])
                     return
 
         for tokenizer in self.tokenizers:
@@ -130,13 +296,33 @@ class Lexer(object):
             if not match:
                 continue
 
-            if len(match.groups()) > 0:
-                tokenizer(self, match.group(1))
-                self.set_position(match.end(1))
+            result = tokenizer.scan(self, match)
+            if result is not None:
+                tokenizer(self, result[0])
+                self.set_position(result[1])
                 return
-            else:
-                tokenizer(self, match.group(0))
-                self.set_position(match.end(0))
+
+        raise LexerError("No lexer matched", self.idx)
+
+    def apply_tokenizers_counting(self):
+        """apply_tokenizers(), counting attempts and tokens in `self.stats`"""
+        stats = self.stats
+        tokenizers = self.tokenizers_newline + self.tokenizers if self.newline else self.tokenizers
+        for tokenizer in tokenizers:
+            stats.tried[tokenizer] += 1
+            match = tokenizer.rx.match(self.text, self.idx)
+
+            if not match:
+                continue
+
+            stats.matched[tokenizer] += 1
+            result = tokenizer.scan(self, match)
+            if result is not None:
+                stats.accepted[tokenizer] += 1
+                stats.token_counts[tokenizer.token_type] += 1
+                stats.token_chars[tokenizer.token_type] += result[1] - self.idx
+                tokenizer(self, result[0])
+                self.set_position(result[1])
                 return
 
         raise LexerError("No lexer matched", self.idx)
@@ -159,13 +345,12 @@ class Lexer(object):
         Change the value of multiline-tokens so they look like they were
         defined on column 1 instead of wherever they were.
         """
-        token = self.tokens.pop(idx)
+        token = self.tokens[idx]
         if token.column < 1:
-            self.tokens.insert(idx, token)
             return
         rx = re.compile(r"^[ \t]{{{}}}".format(token.column), re.MULTILINE)
         newval = rx.sub("", token.value)
-        self.tokens.insert(idx, Token(token.type, newval, token.idx, token.column))
+        self.tokens[idx] = Token(token.type, newval, token.idx, token.column)
 
     def move_inline_comments(self, start_idx):
         """
@@ -190,15 +375,21 @@ class Lexer(object):
         if previous_token.type == ICOMMENT or is_doxy_comment_token(previous_token):
             return
 
-        self.tokens.insert(ins_idx, self.tokens.pop(start_idx))
+        # Rotate the tokens in between instead of popping and inserting, which
+        # would move all the following tokens
+        self.tokens[ins_idx:start_idx + 1] = [self.tokens[start_idx]] + self.tokens[ins_idx:start_idx]
 
     def append_token(self, type, value):
+        if type in INTERNED_TOKEN_TYPES:
+            value = sys.intern(value)
         self.tokens.append(Token(type, value, self.idx, self.column))
 
     def set_position(self, idx):
-        self.idx = idx
-        newline = self.text.rfind("\n", 0, idx)
+        # Only look for a newline in the text of the new token, so that long
+        # lines are not scanned again for each token
+        newline = self.text.rfind("\n", self.idx, idx)
         if newline == -1:
-            self.column = idx
+            self.column += idx - self.idx
         else:
             self.column = idx - newline - 1
+        self.idx = idx
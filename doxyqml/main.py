@@ -2,43 +2,51 @@
 
 import argparse
 import codecs
+import collections
+import contextlib
+import cProfile
+import itertools
 import logging
 import os
-import re
 import sys
+from functools import partial
 
 import doxyqml.qmlparser as qmlparser
 
-from doxyqml import __version__, DESCRIPTION
+from doxyqml import __version__, DESCRIPTION, tracing
+from doxyqml.diagnostics import LineTable, create_diagnostic, format_diagnostic, format_summary
+from doxyqml.formats import FORMATS
 from doxyqml.lexer import Lexer, LexerError
+from doxyqml.modelcache import ModelCache, restore_class
 from doxyqml.qmlclass import QmlClass
+from doxyqml.qmldir import INTERNAL_CLASS_INFO, get_class_info, read_qmldir
+from doxyqml.sources import decode_qml, is_source_path, list_source_files, open_source
 
 
 def coord_for_idx(text, idx):
-    head, sep, tail = text[:idx].rpartition("\n")
-    if sep == "\n":
-        row = head.count("\n") + 2
-    else:
-        row = 1
-    col = len(tail) + 1
-    return row, col
+    return LineTable(text).coord(idx)
 
 
 def line_for_idx(text, idx):
-    bol = text.rfind("\n", 0, idx)
-    if bol == -1:
-        bol = 0
-    eol = text.find("\n", idx)
-    return text[bol:eol]
+    line_table = LineTable(text)
+    return line_table.line(line_table.coord(idx)[0])
 
 
-def info_for_error_at(text, idx):
-    row, col = coord_for_idx(text, idx)
-    line = line_for_idx(text, idx)
-    msg = line + "\n" + "-" * (col - 1) + "^"
+def info_for_error_at(text, idx, line_table=None):
+    if line_table is None:
+        line_table = LineTable(text)
+    row, col = line_table.coord(idx)
+    msg = line_table.line(row) + "\n" + "-" * (col - 1) + "^"
     return row, msg
 
 
+def output_spec(value):
+    fmt, sep, path = value.partition("=")
+    if fmt not in FORMATS:
+        raise argparse.ArgumentTypeError("unknown format '%s'" % fmt)
+    return fmt, (path if sep else "-")
+
+
 def parse_args(argv):
     parser = argparse.ArgumentParser(
         prog="doxyqml",
@@ -59,13 +67,77 @@ def parse_args(argv):
                         action='store_true',
                         default=False,
                         help="Don't create private member documentation for nested components")
+    parser.add_argument("-k", "--keep-going",
+                        action="store_true",
+                        help="Do not stop at the first error: report every error of every file at the end")
+    parser.add_argument("--check",
+                        action="store_true",
+                        help="Only lex and parse the QML files, without rendering or writing anything, and report"
+                             " every error of every file, one per line. Files are checked in --jobs processes,"
+                             " as many as there are CPUs by default, see --jobs")
+    parser.add_argument("--cache-dir",
+                        metavar="DIR",
+                        help="Store parsed models in DIR and reuse them when the QML file has not changed")
     parser.add_argument('--version',
                         action='version',
                         version='%%(prog)s %s' % __version__)
-    parser.add_argument("qml_file",
-                        help="The QML file to parse")
-
-    return parser.parse_args(argv)
+    parser.add_argument("-o", "--output",
+                        action="append",
+                        default=[],
+                        type=output_spec,
+                        metavar="FORMAT=PATH",
+                        help="Write the FORMAT rendering to PATH, '-' means stdout."
+                             " Can be repeated to get several renderings from a single parse."
+                             " When converting several files, PATH is a directory."
+                             " Formats: %s. Defaults to cpp=-" % ", ".join(sorted(FORMATS)))
+    parser.add_argument("--qmldir",
+                        action="append",
+                        default=[],
+                        help="Convert the public types declared in QMLDIR, with the class names and versions"
+                             " it declares. Can be repeated")
+    parser.add_argument("--aggregate",
+                        action="store_true",
+                        help="Write the classes of each module to a single file per output,"
+                             " `<PATH>/<module><format extension>`, instead of one file per QML file")
+    parser.add_argument("--files-from",
+                        metavar="FILE",
+                        help="Convert the QML files whose NUL-separated paths are read from FILE, '-' means"
+                             " stdin. Conversion starts as soon as the first path is read")
+    parser.add_argument("-j", "--jobs",
+                        type=int,
+                        help="Number of processes converting files in parallel when converting several files."
+                             " Defaults to 1, or to the number of CPUs with --check, unless --memory-report,"
+                             " --split-jobs or --profile with --threads is used")
+    parser.add_argument("--threads",
+                        action="store_true",
+                        help="Convert files in a pool of --jobs threads instead of processes. Threads only run in"
+                             " parallel on free-threaded Python builds")
+    parser.add_argument("--memory-report",
+                        action="store_true",
+                        help="Print the memory allocated by each phase of the conversion of each file, and the files"
+                             " with the highest peaks, to stderr. Files are then converted one at a time")
+    parser.add_argument("--profile",
+                        metavar="OUT",
+                        help="Profile the conversion of all files, including in worker processes, and write the"
+                             " merged statistics to OUT as a pstats file and to OUT.collapsed as collapsed stacks"
+                             " for flame graph tools")
+    parser.add_argument("--split-jobs",
+                        type=int,
+                        default=1,
+                        metavar="N",
+                        help="Split the root component of files larger than 1 MiB at its top-level elements, and"
+                             " lex and parse the parts in N processes. Files whose parts cannot be parsed on their"
+                             " own are parsed in one go. Defaults to 1: no splitting")
+    parser.add_argument("qml_files",
+                        nargs="*",
+                        metavar="qml_file",
+                        help="The QML file to parse. Directories are searched for QML files, Qt resource"
+                             " collections (.qrc) and tar or zip archives are read without extracting them")
+
+    args = parser.parse_args(argv)
+    if not args.qml_files and not args.qmldir and not args.files_from:
+        parser.error("a QML file, a --qmldir or a --files-from option is required")
+    return args
 
 
 def find_qmldir_file(qml_file):
@@ -90,105 +162,561 @@ def find_qmldir_file(qml_file):
         dir = parent
 
 
-def find_classname(qml_file, namespace=None):
-    classname = os.path.basename(qml_file).split(".")[0]
-    classversion = None
-    modulename = ''
-
-    qmldir = find_qmldir_file(qml_file)
-
-    if qmldir:
-        text = open(qmldir).read()
-        match = re.match(r'^module\s+((?:\w|\.)+)\s*$', text, re.MULTILINE)
-
-        if match:
-            modulename = match.group(1)
-
-        basedir = os.path.dirname(qmldir)
-
-        rx_internal_type = re.compile(r'^internal\s+(\w+)\s+(\S+)\s*$', re.MULTILINE)
-        rx_object_type = re.compile(r'^(\w+)\s+(\d+(?:\.\d+)*)\s+(\S+)\s*$', re.MULTILINE)
-
+def find_classname(qml_file, namespace=None, qmldirs=None):
+    """
+    Returns the ClassInfo of `qml_file`, see get_class_info(), or
+    INTERNAL_CLASS_INFO if it is an internal type.
+    If `qmldirs` is a dict, the qmldir files read are kept in it by path and
+    reused.
+    """
+    qmldir = None
+    entry = None
+    qmldir_path = find_qmldir_file(qml_file)
+    if qmldir_path:
+        qmldir = qmldirs.get(qmldir_path) if qmldirs is not None else None
+        if qmldir is None:
+            qmldir = read_qmldir(qmldir_path)
+            if qmldirs is not None:
+                qmldirs[qmldir_path] = qmldir
+        entry = qmldir.find_entry(qml_file)
         # skip internal classes
-        for name, path in rx_internal_type.findall(text):
-            filename = os.path.join(basedir, path)
-            if os.path.isfile(filename) and os.path.samefile(qml_file, filename):
-                return None, None, None
-
-        for name, version, path in rx_object_type.findall(text):
-            filename = os.path.join(basedir, path)
-
-            if os.path.isfile(filename) and os.path.samefile(qml_file, filename):
-                classversion = version
-                classname = name
-                break
-
-    if modulename:
-        classname = modulename + '.' + classname
-
-    if namespace:
-        classname = '.'.join(namespace) + '.' + classname
-
-    return classname, classversion, modulename
-
+        if entry is not None and entry.internal:
+            return INTERNAL_CLASS_INFO
+    return get_class_info(qml_file, qmldir, entry, namespace)
+
+
+def lookup_classname(name, namespace=None, qmldirs=None):
+    """find_classname(), traced as a phase of the conversion of `name`"""
+    span = tracing.start(tracing.FIND_CLASSNAME)
+    class_info = find_classname(name, namespace, qmldirs)
+    tracing.finish(span)
+    return class_info
+
+
+def resolve_class_info(files, namespace=None):
+    """
+    Yields the (path, relative_path, class_info, text) tuples of `files`,
+    with `class_info` looked up with find_classname() when it is not set, so
+    that internal types are known before their files are read. Each qmldir
+    file is only read once.
+    """
+    qmldirs = {}
+    for path, relative_path, class_info, text in files:
+        if class_info is None:
+            with tracing.current_file(path):
+                class_info = lookup_classname(path, namespace, qmldirs)
+        yield path, relative_path, class_info, text
+
+
+def list_module_files(qmldir_paths, namespace=None, include_internal=False):
+    """
+    Yields (path, relative_path, class_info, None) tuples for the public
+    types declared in the qmldir files `qmldir_paths`, and the internal ones
+    if `include_internal` is True. `relative_path` is relative to the qmldir
+    directory, `class_info` is the result of get_class_info().
+    """
+    for qmldir_path in qmldir_paths:
+        qmldir = read_qmldir(qmldir_path)
+        entries = qmldir.get_public_entries()
+        if include_internal:
+            entries += qmldir.get_internal_entries()
+        for entry in entries:
+            path = qmldir.get_file_path(entry)
+            if not os.path.isfile(path):
+                logging.warning("%s: file %s of type %s not found", qmldir_path, entry.path, entry.name)
+                continue
+            yield path, os.path.normpath(entry.path), get_class_info(path, qmldir, entry, namespace), None
+
+
+class ConversionError(Exception):
+    """Raised when a QML file cannot be converted. The error has already been reported."""
+
+
+def report_parser_error(name, text, exc, args, diagnostics=None):
+    """
+    Reports QmlParserError `exc`, raised while parsing `text`, the content of
+    `name`, like load_qml_class() does, then raises ConversionError.
+    """
+    idx = exc.token.idx if exc.token else 0
+    if diagnostics is not None:
+        value = exc.token.value if exc.token else None
+        diagnostics.append(create_diagnostic(name, LineTable(text), idx, str(exc), value))
+        raise ConversionError(name)
+    logging.error("Failed to parse %s" % name)
+    row, msg = info_for_error_at(text, idx)
+    logging.error("Lexer error line %d: %s\n%s", row, exc, msg)
+    if args.debug:
+        raise exc
+    raise ConversionError(name)
+
+
+def read_qml_file(name):
+    span = tracing.start(tracing.READ)
+    with open(name, "rb") as f:
+        data = f.read()
+    text = decode_qml(data)
+    tracing.finish(span, len(data))
+    return text
+
+
+def load_qml_class(name, args, cache=None, diagnostics=None, class_info=None, text=None, out=None, splitter=None):
+    """
+    Reads, tokenizes and parses `name`. Returns the resulting QmlClass, or
+    None if the file must not be documented. `class_info` is the result of
+    get_class_info(), it is looked up with find_classname() if not set. Files
+    which must not be documented are not read, unless `args.check` is set:
+    they are then parsed too, with their file name as class name.
+    `text` is the content of the file, it is read from disk if not set.
+    With `args.debug`, tokens are printed to `out`.
+
+    If `splitter` is a splitting.Splitter, large files are lexed and parsed
+    in parts by its worker processes when possible.
+
+    Errors are logged, unless `diagnostics` is a list: they are then appended
+    to it as Diagnostic instances, and parsing goes on to find more errors.
+    ConversionError is raised in both cases.
+    """
+    if class_info is None:
+        class_info = lookup_classname(name, args.namespace)
+    classname, classversion, modulename, singleton = class_info
+    if args.no_since_version:
+        classversion = None
 
-def main(argv=None, out=None):
-    if argv is None:
-        argv = sys.argv[1:]
-    if out is None:
-        out = sys.stdout
+    if classname is None:
+        if not args.check:
+            return None
+        classname = os.path.basename(name).split(".")[0]
 
-    args = parse_args(argv)
+    if text is None:
+        text = read_qml_file(name)
 
-    name = args.qml_file
-    namespace = args.namespace
+    qml_class = QmlClass(classname, classversion, modulename, not args.no_nested_components)
 
-    encoding = "utf-8"
-    first_4_bytes = open(name, 'rb').read(4)
-    if (first_4_bytes.startswith(codecs.BOM_UTF8)):
-        encoding = "utf-8-sig"
-    text = open(name, encoding=encoding).read()
+    if cache:
+        cache_key = cache.key(text, not args.no_nested_components)
+        cached_content = cache.load(cache_key)
+        if cached_content is not None:
+            restore_class(qml_class, cached_content)
+            if singleton:
+                qml_class.mark_singleton()
+            return qml_class
+
+    if splitter is not None and not args.debug:
+        # The parsed content of a split file is in the format of the cache
+        split_content = splitter.parse(text, not args.no_nested_components)
+        if split_content is not None:
+            restore_class(qml_class, split_content)
+            if cache:
+                cache.store(cache_key, qml_class)
+            if singleton:
+                qml_class.mark_singleton()
+            return qml_class
 
     lexer = Lexer(text)
     try:
         lexer.tokenize()
     except LexerError as exc:
+        line_table = LineTable(lexer.text)
+        if diagnostics is not None:
+            diagnostics.append(create_diagnostic(name, line_table, exc.idx, str(exc)))
+            raise ConversionError(name)
         logging.error("Failed to tokenize %s" % name)
-        row, msg = info_for_error_at(text, exc.idx)
+        row, msg = info_for_error_at(lexer.text, exc.idx, line_table)
         logging.error("Lexer error line %d: %s\n%s", row, exc, msg)
         if args.debug:
             raise
-        else:
-            return -1
+        raise ConversionError(name)
 
     if args.debug:
         for token in lexer.tokens:
-            print("%20s %s" % (token.type, token.value))
-
-    classname, classversion, modulename = find_classname(name, namespace)
-    if args.no_since_version:
-        classversion = None
-
-    if classname is None:
-        return 0
-
-    qml_class = QmlClass(classname, classversion, modulename, not args.no_nested_components)
+            print("%20s %s" % (token.type, token.value), file=out)
 
+    errors = [] if diagnostics is not None else None
     try:
-        qmlparser.parse(lexer.tokens, qml_class, not args.no_nested_components)
+        # Nested component bodies are only fully parsed when needed, unless
+        # all errors must be found or the model is stored in the cache
+        qmlparser.parse(lexer.tokens, qml_class, not args.no_nested_components, errors,
+                        lazy_components=errors is None and cache is None)
     except qmlparser.QmlParserError as exc:
-        logging.error("Failed to parse %s" % name)
-        row, msg = info_for_error_at(text, exc.token.idx)
-        logging.error("Lexer error line %d: %s\n%s", row, exc, msg)
-        if args.debug:
-            raise
+        report_parser_error(name, lexer.text, exc, args, diagnostics)
+    if errors:
+        line_table = LineTable(lexer.text)
+        for exc in errors:
+            idx = exc.token.idx if exc.token else 0
+            value = exc.token.value if exc.token else None
+            diagnostics.append(create_diagnostic(name, line_table, idx, str(exc), value))
+        raise ConversionError(name)
+
+    if cache:
+        cache.store(cache_key, qml_class)
+
+    # Declared as a singleton by the qmldir file, the file may have no pragma.
+    # Not part of the cached content, which only depends on the file.
+    if singleton:
+        qml_class.mark_singleton()
+    return qml_class
+
+
+def list_qml_files(paths, namespace=None, include_internal=False):
+    """
+    Yields (path, relative_path, class_info, text) tuples for the QML files
+    to convert, like list_module_files(). Directories are searched
+    recursively, `relative_path` is then relative to the directory. For files
+    it is the file name. Resource collections and archives are read with
+    doxyqml.sources, `relative_path` is then the name of the file inside
+    them.
+    """
+    for path in paths:
+        if is_source_path(path):
+            with open_source(path) as source:
+                yield from list_source_files(source, namespace, include_internal)
+            continue
+        if not os.path.isdir(path):
+            yield path, os.path.basename(path), None, None
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".qml"):
+                    file_path = os.path.join(root, name)
+                    yield file_path, os.path.relpath(file_path, path), None, None
+
+
+def read_file_list(stream):
+    """
+    Yields the NUL-separated paths read from binary `stream`, each one as soon
+    as it has been read.
+    """
+    pending = b""
+    while True:
+        chunk = stream.read1(65536)
+        if not chunk:
+            break
+        paths = (pending + chunk).split(b"\0")
+        pending = paths.pop()
+        for path in paths:
+            if path:
+                yield os.fsdecode(path)
+    if pending:
+        yield os.fsdecode(pending)
+
+
+def get_output_name(path):
+    """
+    Returns the output name of `path`: its path relative to the current
+    directory, or its absolute path without the root if it is not below it.
+    """
+    relpath = os.path.relpath(path)
+    if relpath == os.pardir or relpath.startswith(os.pardir + os.sep):
+        relpath = os.path.splitdrive(os.path.abspath(path))[1].lstrip(os.sep)
+    return relpath
+
+
+def list_listed_files(name):
+    """
+    Yields (path, relative_path, None, None) tuples for the files listed in
+    `name`, see read_file_list(). `relative_path` comes from
+    get_output_name().
+    """
+    if name == "-":
+        stream = sys.stdin.buffer
+    else:
+        stream = open(name, "rb")
+    with stream:
+        for path in read_file_list(stream):
+            yield path, get_output_name(path), None, None
+
+
+def render(fmt, qml_class):
+    span = tracing.start(tracing.RENDER)
+    text = fmt.render(qml_class)
+    tracing.finish(span, len(text))
+    return text
+
+
+def write_outputs(qml_class, outputs, out, output_name=None):
+    """
+    Renders `qml_class` once for each (format, path) pair of `outputs`. If
+    `output_name` is set, paths are directories and the output is written to
+    `<path>/<output_name><format extension>`.
+    """
+    for fmt, path in outputs:
+        text = render(fmt, qml_class)
+        if output_name is not None:
+            path = os.path.join(path, output_name + fmt.extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if path == "-":
+            print(text, file=out)
         else:
-            return -1
+            with open(path, "w", encoding="utf-8") as f:
+                print(text, file=f)
+
+
+class AggregateWriter(object):
+    """
+    Writes the renderings of the classes of each module to a single file per
+    output, `<path>/<module><format extension>`. Each rendering is preceded
+    by the source hint of its format. Classes without a module are written to
+    `global<format extension>`.
+    """
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.files = {}
+
+    def write(self, source_path, modulename, renderings):
+        module = modulename or "global"
+        for (fmt, path), text in zip(self.outputs, renderings):
+            key = (path, module, fmt.extension)
+            f = self.files.get(key)
+            if f is None:
+                os.makedirs(path, exist_ok=True)
+                f = self.files[key] = open(os.path.join(path, module + fmt.extension), "w", encoding="utf-8")
+            print(fmt.source_hint(source_path), file=f)
+            print(text, file=f)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+# `diagnostics` is None unless `args.keep_going` is set. `renderings` is only
+# set for aggregated outputs
+ConversionResult = collections.namedtuple("ConversionResult", ["success", "diagnostics", "modulename", "renderings"])
+
+
+def convert_file(name, output_name, class_info, text, args, outputs, cache=None, out=None, splitter=None):
+    """
+    Converts one file, see load_qml_class() and write_outputs(). Returns a
+    ConversionResult. With `args.aggregate`, nothing is written: the
+    renderings of each output are returned, to be written by an
+    AggregateWriter. With `args.check`, the file is only parsed.
+    """
+    diagnostics = [] if args.keep_going or args.check else None
+    with tracing.current_file(name):
+        try:
+            qml_class = load_qml_class(name, args, cache, diagnostics, class_info, text, out, splitter)
+            if qml_class is None or args.check:
+                return ConversionResult(True, diagnostics, None, None)
+            try:
+                if args.aggregate:
+                    renderings = [render(fmt, qml_class) for fmt, path in outputs]
+                    return ConversionResult(True, diagnostics, qml_class.modulename, renderings)
+                write_outputs(qml_class, outputs, out, output_name)
+            except qmlparser.QmlParserError as exc:
+                # Raised by the body of a nested component, only parsed when
+                # rendered. The text is only read again for the error message.
+                report_parser_error(name, read_qml_file(name) if text is None else text, exc, args, diagnostics)
+        except ConversionError:
+            return ConversionResult(False, diagnostics, None, None)
+        return ConversionResult(True, diagnostics, None, None)
+
+
+def convert_file_in_worker(trace, profile, *args):
+    """
+    Runs convert_file() with `args`, in a worker process or not. Returns its
+    result, the phase events it produced if `trace` is True and its profile
+    statistics if `profile` is True, to be handed to the main process.
+    """
+    events = []
+    profiler = cProfile.Profile() if profile else None
+    with tracing.use_tracer(events.append) if trace else contextlib.nullcontext():
+        if profiler is None:
+            result = convert_file(*args)
+        else:
+            result = profiler.runcall(convert_file, *args)
+    stats = None
+    if profiler is not None:
+        profiler.create_stats()
+        stats = profiler.stats
+    return result, events, stats
+
+
+def convert_files(files, args, outputs, cache=None, out=None, jobs=1, threads=False, profile=None,
+                  splitter=None):
+    """
+    Converts `files`, as listed by list_qml_files(), and yields a
+    (path, ConversionResult) tuple for each of them, in order.
+
+    If `jobs` is more than 1, files are handed to worker processes, or
+    worker threads if `threads` is True, as they are listed. A limited
+    number of files is submitted ahead of the first unfinished one, so that
+    a long list is not buffered in memory.
+
+    Phase events of worker processes are handed to the tracers registered in
+    this process when the results are yielded. If `profile` is a
+    ProfileCollector, each conversion is profiled and its statistics are
+    added to it.
+
+    `splitter` is handed to load_qml_class(). It cannot be used by worker
+    processes.
+    """
+    if jobs <= 1:
+        for file_info in files:
+            if profile is None:
+                yield file_info[0], convert_file(*file_info, args, outputs, cache, out, splitter)
+                continue
+            result, events, stats = convert_file_in_worker(False, True, *file_info, args, outputs, cache, out,
+                                                           splitter)
+            profile.add(stats)
+            yield file_info[0], result
+        return
+
+    # Only imported here: importing it is a large part of the startup time of
+    # doxyqml, which matters when Doxygen runs it once per file
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    pending = collections.deque()
+    if threads:
+        executor = ThreadPoolExecutor(jobs)
+    else:
+        # `out` cannot be handed to another process
+        executor, out = ProcessPoolExecutor(jobs, initializer=tracing.clear_tracers), None
+    # Tracers of this process do not see the phases of worker processes
+    trace = not threads and tracing.is_tracing()
+    if trace or profile is not None:
+        function = partial(convert_file_in_worker, trace, profile is not None)
+    else:
+        function = convert_file
+
+    def get_result(future):
+        if function is convert_file:
+            return future.result()
+        result, events, stats = future.result()
+        for event in events:
+            tracing.emit(event)
+        if stats is not None:
+            profile.add(stats)
+        return result
+
+    with executor:
+        try:
+            for file_info in files:
+                pending.append((file_info[0], executor.submit(function, *file_info, args, outputs, cache, out,
+                                                              splitter)))
+                if len(pending) >= jobs * 4:
+                    name, future = pending.popleft()
+                    yield name, get_result(future)
+            while pending:
+                name, future = pending.popleft()
+                yield name, get_result(future)
+        finally:
+            # Stopped early: do not convert the remaining files
+            for name, future in pending:
+                future.cancel()
+
+
+def main(argv=None, out=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if out is None:
+        out = sys.stdout
 
+    args = parse_args(argv)
+
+    cache = None
+    if args.cache_dir:
+        cache = ModelCache(args.cache_dir)
+
+    outputs = [(FORMATS[fmt], path) for fmt, path in args.output] or [(FORMATS["cpp"], "-")]
     out = codecs.getwriter("utf-8")(out.buffer)
-    print(qml_class, file=out)
 
-    return 0
+    batch = (len(args.qml_files) != 1 or args.qmldir or args.files_from or args.aggregate
+             or os.path.isdir(args.qml_files[0]) or is_source_path(args.qml_files[0]))
+    if batch and not args.check:
+        if any(path == "-" for fmt, path in outputs):
+            logging.error("Output paths must be directories when converting several files")
+            return -1
+        if args.aggregate and any(fmt.source_hint is None for fmt, path in outputs):
+            logging.error("Only cpp outputs can be aggregated")
+            return -1
+    if batch:
+        # Internal types are never documented, but --check must parse them
+        files = itertools.chain(list_module_files(args.qmldir, args.namespace, args.check),
+                                list_qml_files(args.qml_files, args.namespace, args.check))
+        if args.files_from:
+            files = itertools.chain(files, list_listed_files(args.files_from))
+    else:
+        files = [(args.qml_files[0], None, None, None)]
+    files = resolve_class_info(files, args.namespace)
+
+    jobs = 1
+    if batch:
+        if args.jobs is not None:
+            jobs = args.jobs
+        elif args.check and not args.memory_report and not (args.profile and args.threads) \
+                and (args.split_jobs <= 1 or args.threads):
+            # Only defaults to parallel checks when no option conflicts with
+            # converting files in worker processes
+            jobs = os.cpu_count() or 1
+    memory_report = None
+    if args.memory_report:
+        import tracemalloc
+        from doxyqml.memoryreport import MemoryReport
+        # tracemalloc cannot tell the allocations of concurrent conversions
+        # apart
+        if jobs > 1:
+            logging.warning("Ignoring --jobs, files are converted one at a time with --memory-report")
+            jobs = 1
+        memory_report = MemoryReport()
+        tracemalloc.start()
+        tracing.add_tracer(memory_report)
+    profile = None
+    if args.profile:
+        # Python 3.12 and later only allow one profiler at a time
+        if jobs > 1 and args.threads:
+            logging.warning("Ignoring --jobs, --profile does not support --threads")
+            jobs = 1
+        from doxyqml.profiling import ProfileCollector
+        profile = ProfileCollector()
+
+    splitter = None
+    if args.split_jobs > 1:
+        if jobs > 1 and not args.threads:
+            logging.warning("Ignoring --split-jobs, files are already converted in --jobs processes")
+        else:
+            from doxyqml.splitting import Splitter
+            splitter = Splitter(args.split_jobs)
+
+    diagnostics = [] if args.keep_going or args.check else None
+    file_count = 0
+    failed = False
+    aggregate_writer = AggregateWriter(outputs) if args.aggregate and not args.check else None
+    results = convert_files(files, args, outputs, cache, out, jobs, args.threads, profile, splitter)
+    try:
+        for name, result in results:
+            file_count += 1
+            if result.diagnostics:
+                diagnostics.extend(result.diagnostics)
+            if not result.success:
+                if diagnostics is None:
+                    return -1
+                failed = True
+            elif result.renderings is not None:
+                aggregate_writer.write(name, result.modulename, result.renderings)
+    finally:
+        results.close()
+        if aggregate_writer:
+            aggregate_writer.close()
+        if memory_report:
+            tracing.remove_tracer(memory_report)
+            tracemalloc.stop()
+            print(memory_report.format(), file=sys.stderr)
+        if profile:
+            profile.write(args.profile)
+        if splitter:
+            splitter.close()
+
+    if diagnostics and args.check:
+        # One line per error, for CI logs and editors
+        for diagnostic in diagnostics:
+            print(format_diagnostic(diagnostic, compact=True), file=out)
+        print(format_summary(diagnostics, file_count), file=out)
+    elif diagnostics:
+        for diagnostic in diagnostics:
+            logging.error(format_diagnostic(diagnostic))
+        logging.error(format_summary(diagnostics, file_count))
+
+    return -1 if failed else 0
 
 
 if __name__ == "__main__":
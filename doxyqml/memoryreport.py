@@ -0,0 +1,108 @@
+"""
+Memory used by each phase of a conversion, measured with tracemalloc.
+"""
+import tracemalloc
+
+from doxyqml import tracing
+
+KIB = 1024.0
+
+HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class PhaseMemory(object):
+    """
+    `peak` is the highest number of bytes allocated during the phase on top of
+    what was allocated when it started, `retained` the number of bytes still
+    allocated when it ended. A phase run several times for a file, such as
+    rendering to several outputs, adds up its retained bytes.
+    """
+    __slots__ = ("peak", "retained")
+
+    def __init__(self):
+        self.peak = 0
+        self.retained = 0
+
+
+class FileMemory(object):
+    def __init__(self, path):
+        self.path = path
+        self.phases = {}
+        self.token_count = None
+
+    def is_skipped(self):
+        """Returns True if the file was not converted: only its class name was looked up"""
+        return all(x == tracing.FIND_CLASSNAME for x in self.phases)
+
+    def get_peak(self):
+        return max([x.peak for x in self.phases.values()] or [0])
+
+    def get_retained(self, *phases):
+        return sum(self.phases[x].retained for x in phases if x in self.phases)
+
+    def get_token_list_size(self):
+        return self.get_retained(tracing.TOKENIZE, tracing.FIXUP_TOKENS)
+
+    def get_model_size(self):
+        return self.get_retained(tracing.PARSE)
+
+
+class MemoryReport(object):
+    """
+    A tracer measuring the memory used by each phase of each converted file.
+    tracemalloc must be tracing, and files must be converted one at a time in
+    this process: tracemalloc does not tell allocations of concurrent
+    conversions apart.
+
+    tracemalloc cannot reset its peak before Python 3.9: peaks are then the
+    memory still allocated at the end of each phase.
+    """
+    def __init__(self):
+        self.files = {}
+        self._start_size = 0
+
+    def phase_started(self, phase, path):
+        if HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+        self._start_size = tracemalloc.get_traced_memory()[0]
+
+    def __call__(self, event):
+        size, peak = tracemalloc.get_traced_memory()
+        if not HAS_RESET_PEAK:
+            peak = size
+        file_memory = self.files.get(event.path)
+        if file_memory is None:
+            file_memory = self.files[event.path] = FileMemory(event.path)
+        phase_memory = file_memory.phases.get(event.phase)
+        if phase_memory is None:
+            phase_memory = file_memory.phases[event.phase] = PhaseMemory()
+        phase_memory.peak = max(phase_memory.peak, peak - self._start_size)
+        phase_memory.retained += size - self._start_size
+        if event.token_count is not None and event.phase != tracing.PARSE:
+            file_memory.token_count = event.token_count
+
+    def format(self, top=10):
+        """
+        Returns the report: the memory used by each file, in conversion
+        order, then the `top` files with the highest peaks.
+        """
+        lst = ["Memory report, in KiB:"]
+        for file_memory in self.files.values():
+            if file_memory.is_skipped():
+                lst.append("%s: skipped" % file_memory.path)
+                continue
+            # Files loaded from the cache are not tokenized
+            token_text = "" if file_memory.token_count is None else "%d tokens, " % file_memory.token_count
+            lst.append("%s: %stoken list %.1f, model %.1f" % (
+                file_memory.path, token_text, file_memory.get_token_list_size() / KIB,
+                file_memory.get_model_size() / KIB))
+            for phase, phase_memory in file_memory.phases.items():
+                lst.append("    %-15s peak %10.1f  retained %10.1f" % (
+                    phase, phase_memory.peak / KIB, phase_memory.retained / KIB))
+
+        offenders = sorted(self.files.values(), key=lambda x: x.get_peak(), reverse=True)[:top]
+        if offenders:
+            lst.append("Highest peaks:")
+            for file_memory in offenders:
+                lst.append("    %10.1f  %s" % (file_memory.get_peak() / KIB, file_memory.path))
+        return "\n".join(lst)
@@ -0,0 +1,199 @@
+"""
+Serialized cache of parsed QML models.
+
+The content of a parsed QmlClass (everything qmlparser.parse() fills in) is
+turned into nested tuples of builtin types and stored with `marshal`. Loading
+such a file is much cheaper than lexing and parsing the QML source again.
+
+Cache files are keyed on the source text, the parse options and the doxyqml
+version. The version is also stored in the file itself, so entries written by
+another release are never used.
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+
+from doxyqml import __version__
+from doxyqml.qmlclass import QmlClass, QmlComponent, QmlArgument, QmlAttribute, QmlEnum, QmlEnumerator, \
+    QmlProperty, QmlFunction, QmlSignal
+
+MAGIC = b"DQMC"
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".dqm"
+
+
+def _dump_args(args):
+    return [(x.type, x.name, x.default_value, x.spread) for x in args]
+
+
+def _restore_args(data):
+    args = []
+    for type, name, default_value, spread in data:
+        arg = QmlArgument(name)
+        arg.type = type
+        arg.default_value = default_value
+        arg.spread = spread
+        args.append(arg)
+    return args
+
+
+def _dump_element(element):
+    if isinstance(element, str):
+        return element
+    if isinstance(element, QmlProperty):
+        return ("P", element.type, element.name, element.is_default, element.is_readonly,
+                element.doc, element.doc_is_inline)
+    if isinstance(element, QmlFunction):
+        return ("F", element.type, element.name, element.doc, element.doc_is_inline,
+                _dump_args(element.args))
+    if isinstance(element, QmlSignal):
+        return ("S", element.name, element.doc, element.doc_is_inline, _dump_args(element.args))
+    if isinstance(element, QmlAttribute):
+        return ("A", element.name, element.value, element.type, element.doc)
+    if isinstance(element, QmlEnum):
+        enumerators = [(x.name, x.initializer, x.is_last, x.doc, x.doc_is_inline)
+                       for x in element.enumerators]
+        return ("E", element.name, element.doc, element.doc_is_inline, enumerators)
+    if isinstance(element, QmlComponent):
+        element.load_body()
+        return ("C", element.name, element.comment, _dump_elements(element.elements))
+    if isinstance(element, QmlClass):
+        return ("I", element.name, element.version, element.modulename, element.should_separate_blocks,
+                _dump_class_content(element))
+    raise TypeError("Cannot serialize element of type %s" % type(element).__name__)
+
+
+def _dump_elements(elements):
+    return [_dump_element(x) for x in elements]
+
+
+def _restore_element(data):
+    if isinstance(data, str):
+        return data
+    kind = data[0]
+    if kind == "P":
+        obj = QmlProperty()
+        _, obj.type, obj.name, obj.is_default, obj.is_readonly, obj.doc, obj.doc_is_inline = data
+    elif kind == "F":
+        obj = QmlFunction()
+        _, obj.type, obj.name, obj.doc, obj.doc_is_inline, args = data
+        obj.args = _restore_args(args)
+    elif kind == "S":
+        obj = QmlSignal()
+        _, obj.name, obj.doc, obj.doc_is_inline, args = data
+        obj.args = _restore_args(args)
+    elif kind == "A":
+        obj = QmlAttribute()
+        _, obj.name, obj.value, obj.type, obj.doc = data
+    elif kind == "E":
+        obj = QmlEnum()
+        _, obj.name, obj.doc, obj.doc_is_inline, enumerators = data
+        for name, initializer, is_last, doc, doc_is_inline in enumerators:
+            enumerator = QmlEnumerator(name)
+            enumerator.initializer = initializer
+            enumerator.is_last = is_last
+            enumerator.doc = doc
+            enumerator.doc_is_inline = doc_is_inline
+            obj.enumerators.append(enumerator)
+    elif kind == "C":
+        _, name, comment, elements = data
+        obj = QmlComponent(name)
+        obj.comment = comment
+        _restore_elements(obj, elements)
+    elif kind == "I":
+        _, name, version, modulename, should_separate_blocks, content = data
+        obj = QmlClass(name, version, modulename, should_separate_blocks)
+        restore_class(obj, content)
+    else:
+        raise ValueError("Unknown element kind %r" % kind)
+    return obj
+
+
+def _restore_elements(cls, data):
+    for element in data:
+        cls.add_element(_restore_element(element))
+
+
+def _dump_class_content(cls):
+    return (cls.base_name, list(cls.header_comments), list(cls.footer_comments), list(cls.imports),
+            dict(cls.alias), _dump_elements(cls.elements))
+
+
+def dump_class(cls):
+    """
+    Returns the parsed content of `cls` as nested builtin types, suitable
+    for `marshal`. The identity of the class (name, version, module) is not
+    part of it: it is provided again by the caller of restore_class().
+    """
+    return _dump_class_content(cls)
+
+
+def restore_class(cls, data):
+    """
+    Fills `cls`, a freshly created QmlClass, with content returned by
+    dump_class().
+    """
+    base_name, header_comments, footer_comments, imports, alias, elements = data
+    cls.base_name = base_name
+    cls.header_comments.extend(header_comments)
+    cls.footer_comments.extend(footer_comments)
+    cls.imports.extend(imports)
+    cls.alias.update(alias)
+    _restore_elements(cls, elements)
+
+
+def dumps(cls):
+    return MAGIC + marshal.dumps((FORMAT_VERSION, __version__, dump_class(cls)))
+
+
+def loads(data):
+    """
+    Returns the content stored by dumps(), or None if `data` has been
+    written by another format or doxyqml version.
+    """
+    if not data.startswith(MAGIC):
+        return None
+    try:
+        format_version, version, content = marshal.loads(data[len(MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if format_version != FORMAT_VERSION or version != __version__:
+        return None
+    return content
+
+
+class ModelCache(object):
+    """A directory of serialized models, keyed on the QML source"""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, text, parse_sub_classes=True):
+        digest = hashlib.sha1()
+        digest.update(("%s\0%d\0%d\0" % (__version__, FORMAT_VERSION, parse_sub_classes)).encode("utf-8"))
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def path_for_key(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, key):
+        try:
+            with open(self.path_for_key(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return loads(data)
+
+    def store(self, key, cls):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never
+        # see a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps(cls))
+            os.replace(tmp_path, self.path_for_key(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
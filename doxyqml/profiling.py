@@ -0,0 +1,101 @@
+"""
+cProfile statistics merged over the files of a batch, written as a pstats
+file and as collapsed stacks for flame graph tools.
+"""
+import logging
+import os
+import pstats
+
+# Stacks deeper than this are cut, recursive calls are cut at the first
+# repeated function
+MAX_DEPTH = 100
+
+
+class ProfileData(object):
+    """
+    Statistics in the format of cProfile.Profile.stats, as returned by a
+    worker. pstats.Stats accepts this like a profiler.
+    """
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileCollector(object):
+    """Merges the profile statistics of each converted file"""
+    def __init__(self):
+        self.stats = None
+
+    def add(self, stats):
+        data = ProfileData(stats)
+        if self.stats is None:
+            self.stats = pstats.Stats(data)
+        else:
+            self.stats.add(data)
+
+    def write(self, path):
+        """
+        Writes the merged statistics to `path`, and collapsed stacks to
+        `path + ".collapsed"`. If no file was converted, only the empty
+        collapsed stacks are written: pstats cannot read empty statistics.
+        """
+        if self.stats is None:
+            logging.warning("No file converted, not writing profile statistics to %s", path)
+        else:
+            self.stats.dump_stats(path)
+        with open(path + ".collapsed", "w", encoding="utf-8") as f:
+            for stack, count in collapse_stacks(self.stats.stats if self.stats else {}):
+                print("%s %d" % (stack, count), file=f)
+
+
+def format_function(function):
+    filename, lineno, name = function
+    if filename == "~":
+        # A builtin
+        text = name
+    else:
+        text = "%s (%s:%d)" % (name, os.path.basename(filename), lineno)
+    return text.replace(";", ",")
+
+
+def collapse_stacks(stats):
+    """
+    Returns (stack, microseconds) tuples, in the collapsed stack format of
+    flame graph tools, for pstats.Stats.stats `stats`.
+
+    cProfile only records time per caller and callee pair, not full stacks,
+    so stacks are rebuilt from the roots: the time of a function along a
+    stack is split between its own time and its callees in the same
+    proportions as its total time.
+    """
+    counts = {}
+    callees = {}
+    for function, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            callees.setdefault(caller, []).append((function, caller_stats[3]))
+
+    def walk(function, stack, names, time):
+        tt, ct = stats[function][2:4]
+        if ct <= 0:
+            return
+        key = ";".join(names)
+        counts[key] = counts.get(key, 0) + time * tt / ct
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_time in callees.get(function, ()):
+            if callee in stack or callee not in stats:
+                continue
+            stack.append(callee)
+            names.append(format_function(callee))
+            walk(callee, stack, names, time * edge_time / ct)
+            stack.pop()
+            names.pop()
+
+    for function, function_stats in stats.items():
+        if not function_stats[4]:
+            walk(function, [function], [format_function(function)], function_stats[3])
+
+    lst = [(stack, int(round(time * 1000000))) for stack, time in counts.items()]
+    return sorted(x for x in lst if x[1] > 0)
@@ -1,21 +1,94 @@
 import logging
 import re
+import sys
 import typing
 
-TYPE_RX = r"(?P<prefix>\s+type:)(?P<type>[\w\*.<>|]+)"
+TYPE_NAME_RX = r"[\w\*.<>|]+"
 
+# Typed doc comment tags. Each model class scans its doc with the tags it
+# supports, see process_doc_tags().
+PARAM_TAG_RX = r"(?P<param>[@\\]param)\s+type:(?P<param_type>" + TYPE_NAME_RX + r")\s+(?P<param_name>\w+)"
+RETURN_TAG_RX = r"(?P<return_tag>[@\\]returns?)\s+type:(?P<return_type>" + TYPE_NAME_RX + ")"
+TYPE_TAG_RX = r"\s+type:(?P<type>" + TYPE_NAME_RX + ")"
+
+# Qualified whatever the file imports, as doxyqml always did. Other types of
+# the table of get_base_name_table() are only qualified if their module is
+# imported.
 BASE_NAME_DICT = {
     "QtObject": "QtQml.QtObject",
     "Item": "QtQuick.Item",
 }
 
+_base_name_table = None
+
+
+def get_base_name_table():
+    """Returns the table of well-known types, loading it on first use"""
+    global _base_name_table
+    if _base_name_table is None:
+        from doxyqml.qttypes import load_base_name_table
+        _base_name_table = load_base_name_table()
+    return _base_name_table
+
+
+def process_doc_tags(rx, doc, args=(), type=None):
+    """
+    Scans `doc` once for the typed tags matched by `rx` and strips their type
+    annotations.
+
+    Returns a tuple made of:
+    - the new doc,
+    - the type given by the first "@return type:" or "type:" tag, `type` if
+      there is none,
+    - a list of (argument, type) tuples for the arguments from `args`
+      documented with "@param type:",
+    - the names of the documented arguments missing from `args`.
+    """
+    args_by_name = {}
+    for arg in args:
+        args_by_name.setdefault(arg.name, arg)
+
+    lst = []
+    typed_args = []
+    unknown_args = []
+    found_type = False
+    pos = 0
+    for match in rx.finditer(doc):
+        lst.append(doc[pos:match.start()])
+        pos = match.end()
+        groups = match.groupdict()
+        if groups.get("param"):
+            name = groups["param_name"]
+            arg = args_by_name.get(name)
+            if arg is None:
+                unknown_args.append(name)
+            else:
+                typed_args.append((arg, groups["param_type"]))
+            lst.append("@param " + name)
+        elif found_type:
+            # Only the first return or type tag counts
+            lst.append(match.group(0))
+        elif groups.get("return_tag"):
+            found_type = True
+            type = groups["return_type"]
+            lst.append(groups["return_tag"])
+        else:
+            found_type = True
+            type = groups["type"]
+    if pos == 0:
+        return doc, type, typed_args, unknown_args
+    lst.append(doc[pos:])
+    return "".join(lst), type, typed_args, unknown_args
+
+
+def get_arg_types(args, typed_args):
+    """
+    Returns the type of each argument of `args`, as given by the
+    (argument, type) tuples of `typed_args` or by the argument itself.
+    """
+    types = dict(typed_args)
+    return [types.get(x, x.type) for x in args]
 
-def post_process_type(rx, text, type):
-    match = rx.search(text)
-    if match:
-        type = match.group("type")
-        text = text[:match.start("prefix")] + text[match.end("type"):]
-    return text, type
 
 def is_cxx_comment(text):
     if not isinstance(text, str):
@@ -24,30 +97,53 @@ def is_cxx_comment(text):
 
 
 class QmlBaseComponent():
+    __slots__ = ("name", "base_name", "elements", "_elements_by_type", "_id_attribute", "should_separate_blocks",
+                 "class_name", "namespaces")
+
     def __init__(self, name, version = None, should_separate_blocks = True):
         self.name = name
         self.base_name = ""
         self.elements = []
+        # Elements by type, in the order of `elements`, and the "id"
+        # attribute, kept up to date by add_element()
+        self._elements_by_type = {}
+        self._id_attribute = None
         self.should_separate_blocks = should_separate_blocks
 
         lst = name.split(".")
         self.class_name = lst[-1]
         self.namespaces = lst[:-1]
 
+    def _get_elements_of_type(self, type):
+        return list(self._elements_by_type.get(type, ()))
+
     def get_attributes(self):
-        return [x for x in self.elements if isinstance(x, QmlAttribute)]
+        return self._get_elements_of_type(QmlAttribute)
 
     def get_properties(self):
-        return [x for x in self.elements if isinstance(x, QmlProperty)]
+        return self._get_elements_of_type(QmlProperty)
 
     def get_functions(self):
-        return [x for x in self.elements if isinstance(x, QmlFunction)]
+        return self._get_elements_of_type(QmlFunction)
 
     def get_signals(self):
-        return [x for x in self.elements if isinstance(x, QmlSignal)]
+        return self._get_elements_of_type(QmlSignal)
+
+    def get_enums(self):
+        return self._get_elements_of_type(QmlEnum)
+
+    def get_components(self):
+        return self._get_elements_of_type(QmlComponent)
 
     def add_element(self, element):
         self.elements.append(element)
+        element_type = type(element)
+        bucket = self._elements_by_type.get(element_type)
+        if bucket is None:
+            bucket = self._elements_by_type[element_type] = []
+        bucket.append(element)
+        if element_type is QmlAttribute and element.name == "id" and self._id_attribute is None:
+            self._id_attribute = element
 
     def starts_with_cxx_comment(self):
         if not hasattr(self, "doc_is_inline") or not hasattr(self, "doc"):
@@ -72,25 +168,24 @@ class QmlBaseComponent():
                 continue
             self._export_element(element, lst)
 
-    def _export_element_w_access(self, element, lst, is_public,
+    def _export_element_w_access(self, text, lst, is_public,
             last_was_public, last_was_cxx_comment):
+        # `text` is the rendered element, so that each element is only
+        # rendered once
         if is_public != last_was_public:
             if is_public:
                 lst.append("public:")
             else:
                 lst.append("private:")
-        elif last_was_cxx_comment and is_cxx_comment(element) and self.should_separate_blocks:
+        elif last_was_cxx_comment and is_cxx_comment(text) and self.should_separate_blocks:
             lst.append("")
-        self._export_element(element, lst)
+        if text:
+            lst.append(text)
 
     def _start_class(self, lst):
         class_decl = "class " + self.class_name
         if self.base_name:
-            for alias, replacement in self.alias.items():
-                self.base_name = re.sub(alias, replacement, self.base_name)
-            self.base_name = BASE_NAME_DICT.get(self.base_name, self.base_name)
-
-            class_decl += " : public " + self.base_name
+            class_decl += " : public " + self.get_resolved_base_name()
 
         class_decl += " {"
         lst.append(class_decl)
@@ -104,6 +199,8 @@ class QmlClass(QmlBaseComponent):
     VERSION_COMMENT = "/** @version %s */"
     IMPORT_STATEMENT_COMMENT = "/** {} <br><b>Import Statement</b> \\n @code import {} @endcode */"
 
+    __slots__ = ("header_comments", "footer_comments", "imports", "alias", "modulename", "version")
+
     def __init__(self, name, version=None, modulename=None, should_separate_blocks = True):
         QmlBaseComponent.__init__(self, name, version, should_separate_blocks)
         self.header_comments = []
@@ -119,14 +216,45 @@ class QmlClass(QmlBaseComponent):
         if args.lower() == "singleton":
             self.header_comments.append(QmlClass.SINGLETON_COMMENT)
 
+    def mark_singleton(self):
+        """Documents the class as a singleton, like `pragma Singleton`, if not already"""
+        if QmlClass.SINGLETON_COMMENT not in self.header_comments:
+            self.header_comments.insert(0, QmlClass.SINGLETON_COMMENT)
+
+    def resolve_type_name(self, name):
+        """
+        Returns `name` qualified with the module it comes from: an import alias
+        used as qualifier is replaced with the module name, an unqualified
+        well-known Qt type gets its module name prepended if the module is
+        imported.
+        """
+        qualifier, sep, rest = name.partition(".")
+        if sep:
+            module = self.alias.get(qualifier)
+            if module is None:
+                return name
+            return module + "." + rest
+        qualified_name = BASE_NAME_DICT.get(name)
+        if qualified_name is not None:
+            return qualified_name
+        qualified_name = get_base_name_table().get(name)
+        if qualified_name is None or qualified_name.rpartition(".")[0] not in self.imports:
+            return name
+        return qualified_name
+
+    def get_resolved_base_name(self):
+        return self.resolve_type_name(self.base_name)
+
     def add_import(self, decl):
         modules = decl.split()
         module = modules[1]
         if module[0] == '"':
             # Ignore directory or javascript imports for now
             return
+        module = sys.intern(module)
         if "as" in modules:
-            self.alias[modules[modules.index("as")+1]] = modules[1]
+            alias = modules[modules.index("as")+1].rstrip(";")
+            self.alias[sys.intern(alias)] = module
         self.imports.append(module)
 
     def add_header_comment(self, obj):
@@ -177,18 +305,19 @@ class QmlClass(QmlBaseComponent):
         last_element_was_public = False
         last_element_was_cxx_comment = False
         for element in self.elements:
-            if str(element) == "" or isinstance(element, str):
-                self._export_element_w_access(element, lst,
+            text = str(element)
+            if text == "" or isinstance(element, str):
+                self._export_element_w_access(text, lst,
                         last_element_was_public, last_element_was_public,
                         last_element_was_cxx_comment)
-                last_element_was_cxx_comment = is_cxx_comment(element)
+                last_element_was_cxx_comment = is_cxx_comment(text)
             elif element.is_public_element():
-                self._export_element_w_access(element, lst, True,
+                self._export_element_w_access(text, lst, True,
                         last_element_was_public, last_element_was_cxx_comment)
                 last_element_was_public = True
                 last_element_was_cxx_comment = False
             else:
-                self._export_element_w_access(element, lst, False,
+                self._export_element_w_access(text, lst, False,
                         last_element_was_public, last_element_was_cxx_comment)
                 last_element_was_public = False
                 last_element_was_cxx_comment = False
@@ -202,10 +331,36 @@ class QmlClass(QmlBaseComponent):
 
 class QmlComponent(QmlBaseComponent):
     """A component inside a QmlClass"""
+    __slots__ = ("comment", "_body_parser")
 
     def __init__(self, name):
         QmlBaseComponent.__init__(self, name)
         self.comment = None
+        self._body_parser = None
+
+    def set_body_parser(self, body_parser):
+        """
+        Marks the body of the component as not fully parsed: `body_parser` is
+        called with the component to parse it when needed.
+        """
+        self._body_parser = body_parser
+
+    def load_body(self):
+        """Fully parses the body of the component, if it was not already"""
+        body_parser = self._body_parser
+        if body_parser is None:
+            return
+        self._body_parser = None
+        self.elements = []
+        self._elements_by_type = {}
+        self._id_attribute = None
+        body_parser(self)
+
+    def _get_elements_of_type(self, type):
+        # The id and the nested components are always known
+        if type is not QmlComponent:
+            self.load_body()
+        return QmlBaseComponent._get_elements_of_type(self, type)
 
     def _export_content(self, lst):
         component_id = self.get_component_id()
@@ -217,21 +372,21 @@ class QmlComponent(QmlBaseComponent):
 
         # Export child components with the top-level component. This avoids
         # very deep nesting in the generated documentation.
-        self._export_elements(self.elements, lst, filter=lambda x:
-                              isinstance(x, QmlComponent))
+        self._export_elements(self._elements_by_type.get(QmlComponent, ()), lst)
 
     def get_component_id(self):
         # Returns the id of the component, if it has one
-        for attr in self.get_attributes():
-            if attr.name == "id":
-                return attr.value
-        return None
+        if self._id_attribute is None:
+            return None
+        return self._id_attribute.value
 
     def is_public_element(self):
         return False
 
 
 class QmlArgument(object):
+    __slots__ = ("type", "name", "default_value", "spread")
+
     def __init__(self, name):
         self.type = ""
         self.name = name
@@ -239,12 +394,16 @@ class QmlArgument(object):
         self.spread = False
 
     def __str__(self):
+        return self.format(self.type)
+
+    def format(self, type):
+        """Returns the declaration of the argument, with `type` as its type"""
         if self.spread:
             return '.../*{}*/'.format(self.name)
-        elif self.type == "":
+        elif type == "":
             return self.name + self.default_value_string()
         else:
-            return self.type + " " + self.name + self.default_value_string()
+            return type + " " + self.name + self.default_value_string()
 
     def default_value_string(self):
         if self.default_value is None:
@@ -257,6 +416,8 @@ class QmlArgument(object):
 
 
 class QmlAttribute(object):
+    __slots__ = ("name", "value", "type", "doc")
+
     def __init__(self):
         self.name = ""
         self.value = ""
@@ -278,11 +439,13 @@ class QmlAttribute(object):
 
 
 class QmlProperty(object):
-    type_rx = re.compile(TYPE_RX)
+    doc_tag_rx = re.compile(TYPE_TAG_RX)
 
     DEFAULT_PROPERTY_COMMENT = "/** @remark This is the default property */"
     READONLY_PROPERTY_COMMENT = "/** @remark This property is read-only */"
 
+    __slots__ = ("type", "is_default", "is_readonly", "name", "doc", "doc_is_inline")
+
     def __init__(self):
         self.type = ""
         self.is_default = False
@@ -292,22 +455,30 @@ class QmlProperty(object):
         self.doc_is_inline = False
 
     def __str__(self):
-        self.post_process_doc()
+        doc, type = self.process_doc()
         lst = []
         if not self.doc_is_inline:
-            lst.append(self.doc + "\n")
+            lst.append(doc + "\n")
         if self.is_default:
             lst.append(self.DEFAULT_PROPERTY_COMMENT + "\n")
         elif self.is_readonly:
             lst.append(self.READONLY_PROPERTY_COMMENT + "\n")
         lst.append("Q_PROPERTY(%s %s READ dummyGetter_%s_ignore)"
-            % (self.type, self.name, self.name))
+            % (type, self.name, self.name))
         if self.doc_is_inline:
-            lst.append(" " + self.doc)
+            lst.append(" " + doc)
         return "".join(lst)
 
+    def process_doc(self):
+        """
+        Returns the (doc, type) tuple of the property once the type tag of
+        its doc is applied. The property is left unchanged.
+        """
+        doc, type, _, _ = process_doc_tags(self.doc_tag_rx, self.doc, type=self.type)
+        return doc, type
+
     def post_process_doc(self):
-        self.doc, self.type = post_process_type(self.type_rx, self.doc, self.type)
+        self.doc, self.type = self.process_doc()
 
     def is_public_element(self):
         # Doxygen always adds Q_PROPERTY items as public members.
@@ -315,8 +486,9 @@ class QmlProperty(object):
 
 
 class QmlFunction(object):
-    doc_arg_rx = re.compile(r"[@\\]param" + TYPE_RX + r"\s+(?P<name>\w+)")
-    return_rx = re.compile(r"[@\\]returns?" + TYPE_RX)
+    doc_tag_rx = re.compile(PARAM_TAG_RX + "|" + RETURN_TAG_RX)
+
+    __slots__ = ("type", "name", "doc", "doc_is_inline", "args")
 
     def __init__(self):
         self.type = "void"
@@ -326,37 +498,39 @@ class QmlFunction(object):
         self.args = []
 
     def __str__(self):
-        self.post_process_doc()
-        arg_string = ", ".join([str(x) for x in self.args])
+        doc, type, arg_types = self.process_doc()
+        arg_string = ", ".join([x.format(t) for x, t in zip(self.args, arg_types)])
         lst = []
         if not self.doc_is_inline:
-            lst.append(self.doc + "\n")
-        lst.append("%s %s(%s);" % (self.type, self.name, arg_string))
+            lst.append(doc + "\n")
+        lst.append("%s %s(%s);" % (type, self.name, arg_string))
         if self.doc_is_inline:
-            lst.append(" " + self.doc)
+            lst.append(" " + doc)
         return "".join(lst)
 
-    def post_process_doc(self):
-        def repl(match):
-            # For each argument with a specified type, update arg.type and return a typeless @param line
-            type = match.group("type")
-            name = match.group("name")
-            for arg in self.args:
-                if arg.name == name:
-                    arg.type = type
-                    break
-            else:
-                logging.warning("In function %s(): Unknown argument %s" % (self.name, name))
-            return "@param %s" % name
+    def process_doc(self):
+        """
+        Returns the (doc, type, argument types) tuple of the function once
+        the typed tags of its doc are applied. The function and its arguments
+        are left unchanged.
+        """
+        doc, type, typed_args, unknown_args = process_doc_tags(self.doc_tag_rx, self.doc, self.args, self.type)
+        for name in unknown_args:
+            logging.warning("In function %s(): Unknown argument %s" % (self.name, name))
+        return doc, type, get_arg_types(self.args, typed_args)
 
-        self.doc = self.doc_arg_rx.sub(repl, self.doc)
-        self.doc, self.type = post_process_type(self.return_rx, self.doc, self.type)
+    def post_process_doc(self):
+        self.doc, self.type, arg_types = self.process_doc()
+        for arg, type in zip(self.args, arg_types):
+            arg.type = type
 
     def is_public_element(self):
         return True
 
 
 class QmlEnum(object):
+    __slots__ = ("name", "doc", "doc_is_inline", "enumerators")
+
     def __init__(self):
         self.name = ""
         self.doc = ""
@@ -384,6 +558,8 @@ class QmlEnum(object):
 
 
 class QmlEnumerator(object):
+    __slots__ = ("name", "initializer", "is_last", "doc", "doc_is_inline")
+
     def __init__(self, name):
         self.name = name
         self.initializer = ""
@@ -409,6 +585,10 @@ class QmlEnumerator(object):
 
 
 class QmlSignal(object):
+    doc_tag_rx = re.compile(PARAM_TAG_RX)
+
+    __slots__ = ("name", "doc", "doc_is_inline", "args")
+
     def __init__(self):
         self.name = ""
         self.doc = ""
@@ -416,13 +596,14 @@ class QmlSignal(object):
         self.args = []
 
     def __str__(self):
-        arg_string = ", ".join([str(x) for x in self.args])
+        doc, arg_types = self.process_doc()
+        arg_string = ", ".join([x.format(t) for x, t in zip(self.args, arg_types)])
         lst = []
         if not self.doc_is_inline:
-            lst.append(self.doc + "\n")
+            lst.append(doc + "\n")
         lst.append("Q_SIGNALS: void %s(%s); " % (self.name, arg_string))
         if self.doc_is_inline:
-            lst.append(self.doc + "\n")
+            lst.append(doc + "\n")
         # Appending "public:" here makes it possible to declare a signal without
         # turning all functions defined after into signals.
         # It could be replaced with the use of Q_SIGNAL, but my version of
@@ -430,6 +611,22 @@ class QmlSignal(object):
         lst.append("public:")
         return "".join(lst)
 
+    def process_doc(self):
+        """
+        Returns the (doc, argument types) tuple of the signal once the typed
+        tags of its doc are applied. The signal and its arguments are left
+        unchanged.
+        """
+        doc, _, typed_args, unknown_args = process_doc_tags(self.doc_tag_rx, self.doc, self.args)
+        for name in unknown_args:
+            logging.warning("In signal %s(): Unknown argument %s" % (self.name, name))
+        return doc, get_arg_types(self.args, typed_args)
+
+    def post_process_doc(self):
+        self.doc, arg_types = self.process_doc()
+        for arg, type in zip(self.args, arg_types):
+            arg.type = type
+
     def is_public_element(self):
         # Doxygen always adds Q_SIGNALS items as public members.
         return True
@@ -0,0 +1,118 @@
+"""
+Reading of qmldir files, which declare the types of a QML module.
+"""
+import os
+import posixpath
+import re
+import sys
+from collections import namedtuple
+
+
+# `path` is relative to the directory of the qmldir file
+QmldirEntry = namedtuple("QmldirEntry", ["name", "version", "path", "internal", "singleton"])
+
+# The class name, version and module of a QML file, and whether its qmldir
+# file declares it as a singleton. All are None or False for internal types.
+ClassInfo = namedtuple("ClassInfo", ["classname", "version", "modulename", "singleton"])
+INTERNAL_CLASS_INFO = ClassInfo(None, None, None, False)
+
+MODULE_RX = re.compile(r"^module\s+((?:\w|\.)+)\s*$")
+INTERNAL_TYPE_RX = re.compile(r"^internal\s+(\w+)\s+(\S+)\s*$")
+OBJECT_TYPE_RX = re.compile(r"^(singleton\s+)?(\w+)\s+(\d+(?:\.\d+)*)\s+(\S+)\s*$")
+
+
+class Qmldir(object):
+    """
+    The module name and the type entries of a qmldir file. If `virtual` is
+    True, `path` is a slash-separated path inside a resource collection or an
+    archive instead of a path on disk.
+    """
+    def __init__(self, path, module="", virtual=False):
+        self.path = path
+        self.virtual = virtual
+        self.path_module = posixpath if virtual else os.path
+        self.directory = self.path_module.dirname(path)
+        self.module = module
+        self.entries = []
+        self._entries_by_file = {}
+
+    def _file_key(self, path):
+        if self.virtual:
+            return posixpath.normpath(path)
+        return os.path.normcase(os.path.realpath(path))
+
+    def add_entry(self, entry):
+        self.entries.append(entry)
+        key = self._file_key(self.get_file_path(entry))
+        # A file declared as internal is internal, even if it is also
+        # declared as a public type. Otherwise the first declaration wins.
+        if entry.internal or key not in self._entries_by_file:
+            self._entries_by_file[key] = entry
+
+    def get_file_path(self, entry):
+        return self.path_module.join(self.directory, entry.path)
+
+    def find_entry(self, qml_file):
+        """Returns the entry declaring `qml_file`, or None"""
+        return self._entries_by_file.get(self._file_key(qml_file))
+
+    def get_public_entries(self):
+        """
+        Returns the entries of the public types, one per file: a file
+        declared with several versions is only returned for the first one.
+        """
+        return [x for x in self._entries_by_file.values() if not x.internal]
+
+    def get_internal_entries(self):
+        """Returns the entries of the internal types, one per file"""
+        return [x for x in self._entries_by_file.values() if x.internal]
+
+
+def parse_qmldir(text, path, virtual=False):
+    qmldir = Qmldir(path, virtual=virtual)
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = OBJECT_TYPE_RX.match(line)
+        if match:
+            singleton, name, version, file_path = match.groups()
+            qmldir.add_entry(QmldirEntry(name, version, file_path, False, bool(singleton)))
+            continue
+        match = INTERNAL_TYPE_RX.match(line)
+        if match:
+            name, file_path = match.groups()
+            qmldir.add_entry(QmldirEntry(name, None, file_path, True, False))
+            continue
+        match = MODULE_RX.match(line)
+        if match and not qmldir.module:
+            qmldir.module = sys.intern(match.group(1))
+    return qmldir
+
+
+def get_class_info(qml_file, qmldir, entry, namespace=None):
+    """
+    Returns the ClassInfo of `qml_file`, declared in `qmldir` by `entry`.
+    Both can be None.
+    """
+    classname = os.path.basename(qml_file).split(".")[0]
+    classversion = None
+    modulename = qmldir.module if qmldir else ''
+    singleton = False
+
+    if entry is not None:
+        classname = entry.name
+        classversion = entry.version
+        singleton = entry.singleton
+
+    if modulename:
+        classname = modulename + '.' + classname
+
+    if namespace:
+        classname = '.'.join(namespace) + '.' + classname
+
+    return ClassInfo(classname, classversion, modulename, singleton)
+
+
+def read_qmldir(path):
+    with open(path) as f:
+        return parse_qmldir(f.read(), path)
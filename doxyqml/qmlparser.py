@@ -1,4 +1,8 @@
+from collections import namedtuple
+from functools import partial
+
 import doxyqml.lexer as lexer
+from doxyqml import tracing
 
 from doxyqml.qmlclass import QmlClass, QmlComponent, QmlArgument, QmlEnum, QmlEnumerator, QmlProperty, QmlFunction, QmlSignal, QmlAttribute
 
@@ -14,49 +18,164 @@ class QmlParserUnexpectedTokenError(QmlParserError):
         QmlParserError.__init__(self, "Unexpected token: {}".format(str(token)), token)
 
 
-def parse_class_definition(reader, cls, parse_sub_classes = True):
+ParserOptions = namedtuple("ParserOptions", ["parse_sub_classes", "lazy_components"])
+
+
+def parse_class_definition(reader, cls, options):
     token = reader.consume_wo_comments()
     if token.type != lexer.BLOCK_START:
         raise QmlParserError("Expected '{' after base class name", token)
+    handlers = TOKEN_HANDLERS
+    if not options.parse_sub_classes:
+        handlers = dict(handlers)
+        del handlers[lexer.COMPONENT]
+    tokens = reader.tokens
+    count = len(tokens)
     last_comment_token = None
-    while not reader.at_end():
-        token = reader.consume()
-        if is_comment_token(token):
+    while reader.idx < count:
+        token = tokens[reader.idx]
+        reader.idx += 1
+        token_type = token.type
+        if token_type == lexer.BLOCK_END:
+            break
+        if token_type in COMMENT_TOKEN_TYPES:
             if last_comment_token:
                 cls.add_element(last_comment_token.value)
             last_comment_token = token
-        elif token.type == lexer.KEYWORD:
-            parse_class_content(reader, cls, token, last_comment_token)
+            continue
+        entry = handlers.get(token_type)
+        if entry is None:
+            continue
+        handler, takes_doc = entry
+        try:
+            handler(reader, cls, token, last_comment_token, options)
+        except QmlParserError as exc:
+            reader.report_error(exc)
             last_comment_token = None
-        elif token.type == lexer.COMPONENT and parse_sub_classes:
-            parse_class_component(reader, cls, token, last_comment_token)
+            recover_at_block_boundary(reader, exc)
+            continue
+        if takes_doc:
             last_comment_token = None
-        elif token.type == lexer.ATTRIBUTE:
-            parse_class_attribute(reader, cls, token, last_comment_token)
+    if last_comment_token:
+        cls.add_element(last_comment_token.value)
+
+
+def scan_component_body(reader, obj):
+    """
+    Reads the body of nested component `obj` like parse_class_definition()
+    does, but only keeps what is needed to export it: its id attribute and
+    its nested components, which are scanned the same way. Other tokens are
+    only looked at to find where declarations and blocks start: the
+    declarations of built-in keywords are skipped by their token structure,
+    see skip_declaration().
+    """
+    token = reader.consume_wo_comments()
+    if token.type != lexer.BLOCK_START:
+        raise QmlParserError("Expected '{' after base class name", token)
+    tokens = reader.tokens
+    count = len(tokens)
+    idx = reader.idx
+    last_comment_token = None
+    while idx < count:
+        token = tokens[idx]
+        idx += 1
+        token_type = token.type
+        if token_type == lexer.BLOCK_END:
+            break
+        if token_type in COMMENT_TOKEN_TYPES:
+            last_comment_token = token
+            continue
+        if token_type not in SCANNED_TOKEN_TYPES:
+            continue
+        # Consume the same tokens as parse_class_definition()
+        reader.idx = idx
+        try:
+            if token_type == lexer.BLOCK_START:
+                skip_block(reader)
+            elif token_type == lexer.KEYWORD:
+                skip_declaration(reader, token)
+            elif token_type == lexer.COMPONENT:
+                parse_class_component(reader, obj, token, last_comment_token, LAZY_OPTIONS)
+            elif token_type == lexer.ICOMPONENT:
+                reader.consume_expecting(lexer.CHAR)
+                reader.consume_expecting(lexer.ELEMENT)
+                reader.consume_expecting(lexer.BLOCK_START)
+                skip_block(reader)
+            elif token.value == "id":
+                parse_class_attribute(reader, obj, token, last_comment_token)
+            else:
+                reader.consume_expecting(lexer.CHAR)
+                if reader.consume().type == lexer.BLOCK_START:
+                    skip_block(reader)
+        except QmlParserError as exc:
+            reader.report_error(exc)
+            recover_at_block_boundary(reader, exc)
             last_comment_token = None
-        elif token.type == lexer.BLOCK_START:
-            skip_block(reader)
-        elif token.type == lexer.ICOMPONENT:
-            parse_inline_component(reader, cls, token, last_comment_token)
+        idx = reader.idx
+        if token_type != lexer.BLOCK_START:
             last_comment_token = None
+    reader.idx = idx
+
+
+def skip_declaration(reader, token):
+    """
+    Consumes the tokens parse_keyword() would for the declaration starting
+    with `token`, without checking them: the type and name of a property, the
+    name of an enum, or the name and argument list of a function or signal.
+    Block boundaries are left to the caller, as after a parsing error.
+    Keywords registered with register_keyword() are parsed instead.
+    """
+    structure = SKIPPED_KEYWORDS.get(token.value)
+    if structure is None:
+        structure = SKIPPED_KEYWORDS.get(" ".join(token.value.split()))
+        if structure is None:
+            parse_keyword(reader, token)
+            return
+    name_count, has_arguments = structure
+    for _ in range(name_count):
+        token = reader.consume_wo_comments()
+        if token.type in BLOCK_TOKEN_TYPES:
+            reader.idx -= 1
+            return
+    if not has_arguments:
+        return
+    token = reader.consume_wo_comments()
+    if token.type != lexer.CHAR or token.value != "(":
+        reader.idx -= 1
+        return
+    while True:
+        token = reader.consume_wo_comments()
+        if token.type == lexer.BLOCK_START:
+            # An empty object as default value
+            skip_block(reader)
         elif token.type == lexer.BLOCK_END:
-            break
-    if last_comment_token:
-        cls.add_element(last_comment_token.value)
+            reader.idx -= 1
+            return
+        elif token.type == lexer.CHAR and token.value == ")":
+            return
 
 
-def parse_class_content(reader, cls, token, doc_token):
-    keyword = token.value
-    if keyword.endswith("property"):
-        obj = parse_property(reader, keyword)
-    elif keyword == "function":
-        obj = parse_function(reader)
-    elif keyword == "signal":
-        obj = parse_signal(reader)
-    elif keyword == "enum":
-        obj = parse_enum(reader)
-    else:
-        raise QmlParserError("Unknown keyword '%s'" % keyword, token)
+def parse_component_body(tokens, errors, obj):
+    """
+    Parses the body of nested component `obj`, the `tokens` scan_component_body()
+    skipped.
+    """
+    reader = TokenReader(tokens, errors)
+    parse_class_definition(reader, obj, LAZY_OPTIONS)
+
+
+def parse_keyword(reader, token):
+    parser = KEYWORD_PARSERS.get(token.value)
+    if parser is None:
+        # Keywords made of several words may be separated by any whitespace
+        parser = KEYWORD_PARSERS.get(" ".join(token.value.split()))
+        if parser is None:
+            raise QmlParserError("Unknown keyword '%s'" % token.value, token)
+    return parser(reader, token.value)
+
+
+def parse_class_content(reader, cls, token, doc_token, options=None):
+    obj = parse_keyword(reader, token)
     if doc_token is not None:
         obj.doc = doc_token.value
         obj.doc_is_inline = (doc_token.type == lexer.ICOMMENT)
@@ -65,9 +184,15 @@ def parse_class_content(reader, cls, token, doc_token):
     cls.add_element(obj)
 
 
-def parse_class_component(reader, cls, token, doc_token):
+def parse_class_component(reader, cls, token, doc_token, options):
     obj = QmlComponent(token.value)
-    parse_class_definition(reader, obj)
+    if options.lazy_components:
+        start = reader.idx
+        scan_component_body(reader, obj)
+        # Only keeps the tokens of the body alive, not those of the whole file
+        obj.set_body_parser(partial(parse_component_body, reader.tokens[start:reader.idx], reader.errors))
+    else:
+        parse_class_definition(reader, obj, options)
 
     if doc_token is not None:
         obj.comment = doc_token.value
@@ -75,7 +200,7 @@ def parse_class_component(reader, cls, token, doc_token):
     cls.add_element(obj)
 
 
-def parse_class_attribute(reader, cls, token, doc_token) -> QmlAttribute:
+def parse_class_attribute(reader, cls, token, doc_token, options=None) -> QmlAttribute:
     obj = QmlAttribute()
     obj.name = token.value
 
@@ -106,7 +231,7 @@ def parse_property(reader, property_token_value) -> QmlProperty:
     return prop
 
 
-def parse_function(reader) -> QmlFunction:
+def parse_function(reader, keyword="function") -> QmlFunction:
     obj = QmlFunction()
     token = reader.consume_expecting(lexer.ELEMENT)
     obj.name = token.value
@@ -116,7 +241,7 @@ def parse_function(reader) -> QmlFunction:
     return obj
 
 
-def parse_enum(reader) -> QmlEnum:
+def parse_enum(reader, keyword="enum") -> QmlEnum:
     obj = QmlEnum()
     token = reader.consume_expecting(lexer.ELEMENT)
     obj.name = token.value
@@ -190,17 +315,15 @@ def parse_enumerator(reader, name):
     return obj, block_end
 
 
-def parse_signal(reader):
+def parse_signal(reader, keyword="signal"):
     obj = QmlSignal()
     token = reader.consume_expecting(lexer.ELEMENT)
     obj.name = token.value
 
-    idx = reader.idx
-    token = reader.consume_wo_comments()
+    token = reader.peek_wo_comments()
     if token.type == lexer.CHAR and token.value == "(":
+        reader.consume_wo_comments()
         obj.args = parse_arguments(reader, typed=True)
-    else:
-        reader.idx = idx
     return obj
 
 
@@ -269,41 +392,59 @@ def parse_arguments(reader, typed=False):
             spread = True
 
 
-def skip_block(reader):
-    count = 1
-    while True:
-        token = reader.consume_wo_comments()
+def recover_at_block_boundary(reader, exc):
+    """
+    Skips tokens up to the next block boundary after an error: a block start
+    is skipped with its content, a block end is left for the caller to
+    consume.
+    """
+    if reader.idx > 0 and reader.tokens[reader.idx - 1] is exc.token:
+        reader.idx -= 1
+    while not reader.at_end():
+        token = reader.consume()
         if token.type == lexer.BLOCK_START:
-            count += 1
+            skip_block(reader)
+            return
         elif token.type == lexer.BLOCK_END:
-            count -= 1
-            if count == 0:
-                return
+            reader.idx -= 1
+            return
+
+
+def skip_block(reader):
+    """Skips the block whose start was just consumed, up to its matching end"""
+    end = reader.token_index.block_ends.get(reader.idx - 1)
+    if end is None:
+        reader.idx = len(reader.tokens)
+        raise reader.end_of_file_error()
+    reader.idx = end + 1
+
+
+def skip_class_block(reader, cls, token, doc_token, options):
+    skip_block(reader)
 
-def parse_inline_component(reader, cls, token, doc_token):
+
+def parse_inline_component(reader, cls, token, doc_token, options):
     reader.consume_expecting(lexer.CHAR)
     icls = QmlClass(token.value)
     if doc_token:
         icls.add_header_comment(doc_token.value)
     name = reader.consume_expecting(lexer.ELEMENT)
     icls.base_name = name.value
-    parse_class_definition(reader, icls, True)
+    parse_class_definition(reader, icls, options._replace(parse_sub_classes=True))
     cls.add_element(icls)
 
+
 def parse_header(reader, cls):
     while not reader.at_end():
         token = reader.consume()
-        if is_comment_token(token):
-            cls.add_header_comment(token.value)
-        elif token.type == lexer.IMPORT:
-            cls.add_import(token.value)
-        elif token.type == lexer.PRAGMA:
-            cls.add_pragma(token.value)
-        elif token.type == lexer.COMPONENT:
+        if token.type == lexer.COMPONENT:
             cls.base_name = token.value
             return
+        handler = HEADER_TOKEN_HANDLERS.get(token.type)
+        if handler is None:
+            reader.report_error(QmlParserUnexpectedTokenError(token))
         else:
-            raise QmlParserUnexpectedTokenError(token)
+            handler(cls, token.value)
 
 
 def parse_footer(reader, cls):
@@ -312,28 +453,170 @@ def parse_footer(reader, cls):
         if is_comment_token(token):
             cls.add_footer_comment(token.value)
         else:
-            raise QmlParserUnexpectedTokenError(token)
+            reader.report_error(QmlParserUnexpectedTokenError(token))
+
+
+COMMENT_TOKEN_TYPES = frozenset([lexer.COMMENT, lexer.ICOMMENT])
+
+# Tokens whose positions are recorded by TokenIndex
+INDEXED_TOKEN_TYPES = frozenset([lexer.COMMENT, lexer.ICOMMENT, lexer.BLOCK_START, lexer.BLOCK_END])
+
+BLOCK_TOKEN_TYPES = frozenset([lexer.BLOCK_START, lexer.BLOCK_END])
+
+# Tokens of a nested component body handled by scan_component_body()
+SCANNED_TOKEN_TYPES = frozenset([lexer.KEYWORD, lexer.COMPONENT, lexer.ATTRIBUTE, lexer.ICOMPONENT,
+                                 lexer.BLOCK_START])
 
 
 def is_comment_token(token):
-    return token.type in (lexer.COMMENT, lexer.ICOMMENT)
+    return token.type in COMMENT_TOKEN_TYPES
+
+
+# Parsers of the declarations starting with a keyword, called with the reader
+# and the keyword. They return the element to add to the class.
+KEYWORD_PARSERS = {
+    "property": parse_property,
+    "default property": parse_property,
+    "readonly property": parse_property,
+    "function": parse_function,
+    "signal": parse_signal,
+    "enum": parse_enum,
+}
+
+# Structure of the declarations of the built-in keywords, skipped by
+# scan_component_body(), as (name_count, has_arguments) tuples: the number of
+# tokens before the optional argument list, and whether there can be one.
+SKIPPED_KEYWORDS = {
+    "property": (2, False),
+    "default property": (2, False),
+    "readonly property": (2, False),
+    "function": (1, True),
+    "signal": (1, True),
+    "enum": (1, False),
+}
+
+# Handlers of the tokens of a class body by token type, as (handler,
+# takes_doc) tuples. Handlers are called with the reader, the class, the token,
+# the preceding comment token if any and the ParserOptions. If takes_doc is
+# False, the preceding comment is kept for the next element.
+TOKEN_HANDLERS = {
+    lexer.KEYWORD: (parse_class_content, True),
+    lexer.COMPONENT: (parse_class_component, True),
+    lexer.ATTRIBUTE: (parse_class_attribute, True),
+    lexer.ICOMPONENT: (parse_inline_component, True),
+    lexer.BLOCK_START: (skip_class_block, False),
+}
+
+# Handlers of the tokens of the file header, by token type. Handlers are called
+# with the class and the token value.
+HEADER_TOKEN_HANDLERS = {
+    lexer.COMMENT: QmlClass.add_header_comment,
+    lexer.ICOMMENT: QmlClass.add_header_comment,
+    lexer.IMPORT: QmlClass.add_import,
+    lexer.PRAGMA: QmlClass.add_pragma,
+}
+
+LAZY_OPTIONS = ParserOptions(parse_sub_classes=True, lazy_components=True)
+
+
+def register_keyword(keyword, parser):
+    """
+    Makes `parser` parse the declarations starting with `keyword`, see
+    KEYWORD_PARSERS. The lexer must produce a KEYWORD token for it.
+    """
+    keyword = " ".join(keyword.split())
+    KEYWORD_PARSERS[keyword] = parser
+    # The declaration structure of a built-in keyword may change with it
+    SKIPPED_KEYWORDS.pop(keyword, None)
+
+
+def register_token_handler(token_type, handler, takes_doc=True):
+    """
+    Makes `handler` handle the tokens of type `token_type` found in class
+    bodies, see TOKEN_HANDLERS.
+    """
+    TOKEN_HANDLERS[token_type] = (handler, takes_doc)
+
+
+class TokenIndex(object):
+    """
+    Positions computed once for a token list, so that the readers of the list
+    skip comments and blocks with lookups instead of reading each token:
+
+    - `comment_ends` maps the position of each comment to the position of the
+      first non-comment token after it.
+    - `block_ends` maps the position of each block start to the position of
+      its matching block end. Block starts which are not terminated are not
+      in it.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.comment_ends = comment_ends = {}
+        self.block_ends = block_ends = {}
+        positions = [(idx, token.type) for idx, token in enumerate(tokens) if token.type in INDEXED_TOKEN_TYPES]
+        comments = []
+        starts = []
+        for idx, token_type in positions:
+            if comments and comments[-1] != idx - 1:
+                for comment_idx in comments:
+                    comment_ends[comment_idx] = comments[-1] + 1
+                comments = []
+            if token_type == lexer.BLOCK_START:
+                starts.append(idx)
+            elif token_type == lexer.BLOCK_END:
+                if starts:
+                    block_ends[starts.pop()] = idx
+            else:
+                comments.append(idx)
+        for comment_idx in comments:
+            comment_ends[comment_idx] = comments[-1] + 1
 
 
 class TokenReader(object):
-    def __init__(self, tokens):
+    """
+    Reads tokens for the parser. If `errors` is a list, recoverable errors
+    are appended to it and parsing goes on, otherwise they are raised.
+
+    `token_index` is the TokenIndex of `tokens`, created if not given.
+    """
+    def __init__(self, tokens, errors=None, token_index=None):
         self.tokens = tokens
         self.idx = 0
+        self.errors = errors
+        self.token_index = token_index or TokenIndex(tokens)
+
+    def end_of_file_error(self):
+        return QmlParserError("Unexpected end of file", self.tokens[-1] if self.tokens else None)
 
     def consume(self):
-        token = self.tokens[self.idx]
+        try:
+            token = self.tokens[self.idx]
+        except IndexError:
+            raise self.end_of_file_error()
         self.idx += 1
         return token
 
+    def report_error(self, exc):
+        if self.errors is None:
+            raise exc
+        self.errors.append(exc)
+
     def consume_wo_comments(self):
-        while True:
-            token = self.consume()
-            if not is_comment_token(token):
-                return token
+        idx = self.token_index.comment_ends.get(self.idx, self.idx)
+        if idx >= len(self.tokens):
+            # Like consume(), leave the reader at the end of file
+            self.idx = len(self.tokens)
+            raise self.end_of_file_error()
+        self.idx = idx + 1
+        return self.tokens[idx]
+
+    def peek_wo_comments(self):
+        """Returns the next non-comment token without consuming it"""
+        idx = self.token_index.comment_ends.get(self.idx, self.idx)
+        if idx >= len(self.tokens):
+            self.idx = len(self.tokens)
+            raise self.end_of_file_error()
+        return self.tokens[idx]
 
     def consume_expecting(self, expected_types, value=None):
         token = self.consume_wo_comments()
@@ -353,8 +636,25 @@ class TokenReader(object):
         return self.idx == len(self.tokens)
 
 
-def parse(tokens, cls, parse_sub_classes = True):
-    reader = TokenReader(tokens)
-    parse_header(reader, cls)
-    parse_class_definition(reader, cls, parse_sub_classes)
-    parse_footer(reader, cls)
+def parse(tokens, cls, parse_sub_classes = True, errors=None, lazy_components=False):
+    """
+    Parses `tokens` into `cls`. If `errors` is a list, parsing errors are
+    appended to it and parsing resumes at the next block boundary, instead of
+    raising QmlParserError.
+
+    If `lazy_components` is True, the bodies of nested components are only
+    scanned for ids and nested components. They are fully parsed when
+    QmlComponent.load_body() is called, or when one of their other elements is
+    requested. Errors in the skipped parts are only reported then.
+    """
+    span = tracing.start(tracing.PARSE)
+    reader = TokenReader(tokens, errors)
+    try:
+        parse_header(reader, cls)
+        parse_class_definition(reader, cls, ParserOptions(parse_sub_classes, lazy_components))
+        parse_footer(reader, cls)
+    except QmlParserError as exc:
+        # Errors which cannot be recovered from, such as a missing base class
+        reader.report_error(exc)
+    finally:
+        tracing.finish(span, token_count=len(tokens))
@@ -0,0 +1,45 @@
+"""
+QML types provided by Qt modules, used to qualify unqualified base class
+names of files importing their module, for example to turn `Rectangle` into
+`QtQuick.Rectangle`.
+
+Only modules whose type names are effectively reserved are listed: a QML file
+is unlikely to declare its own `Rectangle` or `ListModel`, while it may well
+declare its own `Button`. This module is only imported when a base class name
+needs to be resolved.
+"""
+
+MODULE_TYPES = {
+    "QtQml": """
+        Binding Component Connections Instantiator LoggingCategory QtObject Timer
+        """,
+    "QtQml.Models": """
+        DelegateModel DelegateModelGroup ItemSelectionModel ListElement ListModel ObjectModel Package
+        """,
+    "QtQuick": """
+        AnimatedImage AnimatedSprite Animation AnimationController Behavior BorderImage Canvas ColorAnimation
+        Column DoubleValidator DragHandler DropArea Flickable Flipable Flow FocusScope FontLoader
+        FontMetrics Gradient GradientStop Grid GridView HoverHandler Image IntValidator Item ListView Loader
+        MouseArea MultiPointTouchArea NumberAnimation ParallelAnimation ParentAnimation Path PathAnimation
+        PathArc PathCubic PathCurve PathInterpolator PathLine PathQuad PathView PauseAnimation PinchArea
+        PinchHandler PointHandler PropertyAction PropertyAnimation PropertyChanges Rectangle RegularExpressionValidator
+        Repeater Rotation RotationAnimation Row Scale ScriptAction SequentialAnimation ShaderEffect
+        ShaderEffectSource Shortcut SmoothedAnimation SpringAnimation SpriteSequence State StateGroup TapHandler
+        Text TextEdit TextInput TextMetrics Transition Translate Vector3dAnimation WheelHandler
+        """,
+    "QtQuick.Layouts": """
+        ColumnLayout GridLayout RowLayout StackLayout
+        """,
+    "QtQuick.Window": """
+        Window
+        """,
+}
+
+
+def load_base_name_table():
+    """Returns a dict mapping type names to their qualified name"""
+    table = {}
+    for module, types in MODULE_TYPES.items():
+        for name in types.split():
+            table[name] = module + "." + name
+    return table
@@ -0,0 +1,201 @@
+"""
+QML files read from Qt resource collections (.qrc) and from tar or zip
+archives, without extracting them to disk.
+"""
+import codecs
+import logging
+import os
+import posixpath
+import re
+import tarfile
+import zipfile
+from xml.etree import ElementTree
+
+from doxyqml.qmldir import get_class_info, parse_qmldir
+
+# A Windows drive, as in "C:foo" or "C:/foo"
+DRIVE_RX = re.compile(r"[A-Za-z]:")
+
+
+def decode_qml(data):
+    """Decodes the bytes of a QML file like reading it in text mode does"""
+    encoding = "utf-8-sig" if data.startswith(codecs.BOM_UTF8) else "utf-8"
+    return data.decode(encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+
+class Source(object):
+    """
+    A collection of files with slash-separated names. Subclasses implement
+    list_names() and read(name), which returns the content of a file as bytes.
+    Sources which can only be read efficiently in order set `sequential` and
+    implement read_all().
+    """
+    sequential = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class QrcSource(Source):
+    """The files listed in a Qt resource collection, named by resource path"""
+    def __init__(self, path):
+        Source.__init__(self, path)
+        self.files = {}
+        base_dir = os.path.dirname(path)
+        root = ElementTree.parse(path).getroot()
+        for resource in root.iter("qresource"):
+            prefix = resource.get("prefix", "/")
+            for element in resource.iter("file"):
+                file_path = element.text.strip()
+                name = posixpath.normpath(posixpath.join(prefix, element.get("alias") or file_path))
+                self.files[name.lstrip("/")] = os.path.join(base_dir, file_path)
+
+    def list_names(self):
+        return list(self.files)
+
+    def read(self, name):
+        with open(self.files[name], "rb") as f:
+            return f.read()
+
+
+class ZipSource(Source):
+    def __init__(self, path):
+        Source.__init__(self, path)
+        self.archive = zipfile.ZipFile(path)
+
+    def list_names(self):
+        return [x.filename for x in self.archive.infolist() if not x.is_dir()]
+
+    def read(self, name):
+        with self.archive.open(name) as f:
+            return f.read()
+
+    def close(self):
+        self.archive.close()
+
+
+class TarSource(Source):
+    # Reading members out of archive order seeks backwards, which decompresses
+    # a compressed archive again from its start
+    sequential = True
+
+    def __init__(self, path):
+        Source.__init__(self, path)
+        self.archive = tarfile.open(path)
+        self.members = {}
+
+    def list_names(self):
+        for member in self.archive.getmembers():
+            if member.isfile():
+                self.members[posixpath.normpath(member.name)] = member
+        return list(self.members)
+
+    def read(self, name):
+        with self.archive.extractfile(self.members[name]) as f:
+            return f.read()
+
+    def read_all(self, predicate):
+        """
+        Yields (name, content) tuples for the files whose names match
+        `predicate`, in archive order. Each member is read when its tuple is
+        requested.
+        """
+        for member in self.archive:
+            name = posixpath.normpath(member.name)
+            if member.isfile() and predicate(name):
+                with self.archive.extractfile(member) as f:
+                    yield name, f.read()
+
+    def close(self):
+        self.archive.close()
+
+
+def is_source_path(path):
+    """Returns True if `path` is a resource collection or an archive"""
+    if path.endswith(".qml") or not os.path.isfile(path):
+        return False
+    return path.endswith(".qrc") or zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def open_source(path):
+    if path.endswith(".qrc"):
+        return QrcSource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    return TarSource(path)
+
+
+def is_safe_name(name):
+    """
+    Returns True if `name`, used as an output name, stays below the output
+    directory: it must be relative and have no ".." part.
+    """
+    if name.startswith(("/", "\\")) or DRIVE_RX.match(name):
+        return False
+    return os.pardir not in re.split(r"[/\\]", name)
+
+
+def _find_qmldir(qmldirs, name):
+    directory = posixpath.dirname(name)
+    while True:
+        qmldir = qmldirs.get(directory)
+        if qmldir is not None or not directory:
+            return qmldir
+        directory = posixpath.dirname(directory)
+
+
+def list_source_files(source, namespace=None, include_internal=False):
+    """
+    Yields (path, name, class_info, text) tuples for the QML files of
+    `source`, except internal ones unless `include_internal` is True. Class
+    names and versions come from the qmldir files of `source`. Files are read
+    one at a time, in name order, or in archive order for sequential
+    sources: their qmldir files are read in a first pass over the archive,
+    then QML files in a second one. Files whose names would be written
+    outside the output directory are skipped.
+    """
+    def is_qmldir(name):
+        return posixpath.basename(name) == "qmldir"
+
+    if source.sequential:
+        names = None
+        qmldir_files = source.read_all(is_qmldir)
+    else:
+        names = sorted(source.list_names())
+        qmldir_files = ((x, source.read(x)) for x in names if is_qmldir(x))
+
+    qmldirs = {}
+    for name, data in qmldir_files:
+        qmldir = parse_qmldir(decode_qml(data), name, virtual=True)
+        qmldirs[qmldir.directory] = qmldir
+
+    def find_entry(name):
+        qmldir = _find_qmldir(qmldirs, name)
+        return qmldir, qmldir.find_entry(name) if qmldir else None
+
+    def is_converted(name):
+        if not name.endswith(".qml"):
+            return False
+        if not is_safe_name(name):
+            logging.warning("Skipping %s in %s: not a relative path below the archive root", name, source.path)
+            return False
+        qmldir, entry = find_entry(name)
+        return include_internal or entry is None or not entry.internal
+
+    if names is None:
+        qml_files = source.read_all(is_converted)
+    else:
+        qml_files = ((x, source.read(x)) for x in names if is_converted(x))
+    for name, data in qml_files:
+        qmldir, entry = find_entry(name)
+        class_info = get_class_info(name, qmldir, entry, namespace)
+        yield os.path.join(source.path, name), name, class_info, decode_qml(data)
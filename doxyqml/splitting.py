@@ -0,0 +1,199 @@
+"""
+Parallel lexing and parsing of large QML files.
+
+Generated QML files can hold thousands of sibling components in a single
+root component, which converting files in parallel does not help with. The
+root component body of such a file is split into parts at top-level element
+boundaries, found by a pre-scan of the brace depth. The parts are lexed and
+parsed in worker processes, and the parsed contents are merged in the
+original element order.
+
+The pre-scan does not have to be exact: each part checks on its own tokens
+that the split does not change what the lexer and the parser would have done
+on the whole file. If any part fails to, the file is lexed and parsed in one
+go instead.
+"""
+import logging
+import re
+
+import doxyqml.lexer as lexer
+import doxyqml.qmlparser as qmlparser
+
+from doxyqml.modelcache import dump_class
+from doxyqml.qmlclass import QmlClass
+
+# Files smaller than this are not worth handing to worker processes
+MIN_SIZE = 1 << 20
+# More parts than workers, so that workers finishing early pick up more work
+PARTS_PER_JOB = 2
+
+# Characters changing the brace depth, and starts of strings and comments,
+# which may contain braces
+SCAN_RX = re.compile(r"[{}\"'`]|/[/*]")
+QUOTE_RXS = dict((x, re.compile(r"[%s\\]" % x)) for x in "\"'`")
+# The end of a line holding the closing brace of a top-level element, then
+# the start of the next non-empty line if it starts with an identifier
+SPLIT_POINT_RX = re.compile(r"[ \t\r]*\n(?:[ \t\r]*\n)*(?=[ \t]*\w)")
+
+# Stand for the braces of the root component around the parts which do not
+# have them
+PART_START_TOKEN = lexer.Token(lexer.BLOCK_START, "{", 0, 0)
+PART_END_TOKEN = lexer.Token(lexer.BLOCK_END, "}", 0, 0)
+
+
+def find_split_points(text, count):
+    """
+    Returns up to `count - 1` positions in `text` to split it at, spread as
+    evenly as possible. Each position is the start of a line following the
+    closing brace of a top-level element of the root component, and starting
+    with an identifier.
+    """
+    step = len(text) // count
+    target = step
+    points = []
+    depth = 0
+    pos = 0
+    while len(points) < count - 1:
+        match = SCAN_RX.search(text, pos)
+        if match is None:
+            break
+        char = match.group()
+        pos = match.end()
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 1 and pos >= target:
+                match = SPLIT_POINT_RX.match(text, pos)
+                if match is not None:
+                    pos = match.end()
+                    points.append(pos)
+                    target = pos + step
+        elif char == "//":
+            pos = text.find("\n", pos)
+            if pos == -1:
+                break
+        elif char == "/*":
+            pos = text.find("*/", pos)
+            if pos == -1:
+                break
+            pos += 2
+        else:
+            quote_rx = QUOTE_RXS[char]
+            while True:
+                match = quote_rx.search(text, pos)
+                if match is None or match.group() == char:
+                    break
+                pos = match.end() + 1
+            if match is None:
+                break
+            pos = match.end()
+    return points
+
+
+def parse_part(text, first, last, parse_sub_classes=True):
+    """
+    Lexes and parses `text`, a part of a file returned by split(). The first
+    part holds the header and the start of the root component, the last one
+    its end and the footer. Returns the parsed content as returned by
+    dump_class(), or None if the part cannot be parsed on its own: then the
+    whole file must be parsed in one go, which also reports any error.
+    """
+    part_lexer = lexer.Lexer(text)
+    if not first:
+        # Keeps the fixups of the first tokens from looking before the part
+        part_lexer.tokens.append(PART_START_TOKEN)
+    try:
+        part_lexer.scan_tokens()
+        part_lexer.fixup_tokens()
+    except Exception:
+        return None
+    tokens = part_lexer.tokens
+    if not last:
+        # A failed scan for the end of a string or comment may have succeeded
+        # after the part. The part must end with a top-level block end, with
+        # the root component left open in the first part.
+        if part_lexer.scan_limits or tokens[-1].type != lexer.BLOCK_END:
+            return None
+        depth = sum(1 if x.type == lexer.BLOCK_START else -1 for x in tokens
+                    if x.type == lexer.BLOCK_START or x.type == lexer.BLOCK_END)
+        if depth != 1:
+            return None
+        # The parser may take a block end for something else, see below
+        tokens += [PART_END_TOKEN, PART_END_TOKEN]
+
+    cls = QmlClass("Part")
+    errors = []
+    reader = qmlparser.TokenReader(tokens, errors)
+    try:
+        if first:
+            qmlparser.parse_header(reader, cls)
+        qmlparser.parse_class_definition(reader, cls, qmlparser.ParserOptions(parse_sub_classes, False))
+        if last:
+            qmlparser.parse_footer(reader, cls)
+    except qmlparser.QmlParserError:
+        return None
+    if errors:
+        return None
+    if not last:
+        # The root component must end at the first end token added to the
+        # part, not in a nested element which used up a block end of the
+        # part as the value of an attribute for instance. A comment left at
+        # the end would have documented the first element of the next part.
+        if reader.idx != len(tokens) - 1 or (cls.elements and isinstance(cls.elements[-1], str)):
+            return None
+    return dump_class(cls)
+
+
+def merge_parts(contents):
+    """Merges the dump_class() contents of the parts of a file into one"""
+    base_name, header_comments, footer_comments, imports, alias, elements = contents[0]
+    elements = list(elements)
+    for content in contents[1:]:
+        elements.extend(content[5])
+    return base_name, header_comments, contents[-1][2], imports, alias, elements
+
+
+def split(text, count):
+    """Returns up to `count` parts of `text`, see find_split_points()"""
+    bounds = [0] + find_split_points(text, count) + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class Splitter(object):
+    """
+    Lexes and parses files of at least `min_size` characters, MIN_SIZE by
+    default, in `jobs` worker processes. Can be used from several threads.
+    """
+    def __init__(self, jobs, min_size=None):
+        # Only imported here, see main.convert_files()
+        from concurrent.futures import ProcessPoolExecutor
+        from doxyqml import tracing
+        self.jobs = jobs
+        self.min_size = MIN_SIZE if min_size is None else min_size
+        # Worker processes are only started on the first submitted part
+        self.executor = ProcessPoolExecutor(jobs, initializer=tracing.clear_tracers)
+
+    def parse(self, text, parse_sub_classes=True):
+        """
+        Returns the content of QML source `text` as returned by dump_class(),
+        or None if it must be lexed and parsed in one go: because it is too
+        small, it has no split points, or its parts cannot be parsed on
+        their own.
+        """
+        if len(text) < self.min_size:
+            return None
+        parts = split(text, self.jobs * PARTS_PER_JOB)
+        if len(parts) < 2:
+            return None
+        futures = [self.executor.submit(parse_part, part, idx == 0, idx == len(parts) - 1, parse_sub_classes)
+                   for idx, part in enumerate(parts)]
+        contents = [x.result() for x in futures]
+        if None in contents:
+            logging.debug("Part %d of %d cannot be parsed on its own, parsing the file in one go",
+                          contents.index(None) + 1, len(parts))
+            return None
+        return merge_parts(contents)
+
+    def close(self):
+        self.executor.shutdown()
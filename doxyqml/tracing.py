@@ -0,0 +1,120 @@
+"""
+Hooks reporting the phases of each conversion, for build telemetry.
+
+A tracer is a callable receiving a PhaseEvent each time a phase ends. If it
+also has a phase_started(phase, path) method, that method is called when a
+phase starts. Register a tracer with add_tracer(), or for the duration of a
+block with use_tracer():
+
+    with tracing.use_tracer(events.append):
+        main.main(["--jobs", "4", "src", "-o", "cpp=out"])
+
+Events carry the path set by current_file(). doxyqml sets it for each file
+it converts, library users calling Lexer.tokenize() or qmlparser.parse()
+directly can set it themselves.
+
+Phases report their own duration: "tokenize" does not include
+"fixup_tokens". When no tracer is registered, starting and finishing a phase
+costs a function call.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+READ = "read"
+TOKENIZE = "tokenize"
+FIXUP_TOKENS = "fixup_tokens"
+FIND_CLASSNAME = "find_classname"
+PARSE = "parse"
+RENDER = "render"
+
+# `start` is a time.time() timestamp, so that events of worker processes can
+# be compared, `duration` is in seconds. `size` is the number of bytes read
+# for the read phase, the number of characters of the text or of the
+# rendering otherwise. `size` and `token_count` are None for phases they do
+# not apply to.
+PhaseEvent = namedtuple("PhaseEvent", ["phase", "path", "start", "duration", "size", "token_count"])
+
+# Replaced instead of modified, so that phases can read them without a lock
+_tracers = ()
+_start_hooks = ()
+_tracers_lock = threading.Lock()
+
+_current_path = ContextVar("doxyqml_current_path", default=None)
+
+
+def _set_tracers(tracers):
+    global _tracers, _start_hooks
+    _start_hooks = tuple(x.phase_started for x in tracers if hasattr(x, "phase_started"))
+    _tracers = tracers
+
+
+def add_tracer(tracer):
+    with _tracers_lock:
+        _set_tracers(_tracers + (tracer,))
+
+
+def remove_tracer(tracer):
+    with _tracers_lock:
+        lst = list(_tracers)
+        lst.remove(tracer)
+        _set_tracers(tuple(lst))
+
+
+def clear_tracers():
+    """
+    Removes all tracers. Called in worker processes, which inherit the tracers
+    of the main process when they are forked: their events are handed to the
+    main process instead.
+    """
+    with _tracers_lock:
+        _set_tracers(())
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Registers `tracer` for the duration of the block"""
+    add_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        remove_tracer(tracer)
+
+
+def is_tracing():
+    return bool(_tracers)
+
+
+@contextmanager
+def current_file(path):
+    """Sets the path of the events of the phases run in the block"""
+    token = _current_path.set(path)
+    try:
+        yield
+    finally:
+        _current_path.reset(token)
+
+
+def start(phase):
+    """Returns a span to pass to finish(), or None if nothing is traced"""
+    if not _tracers:
+        return None
+    path = _current_path.get()
+    for hook in _start_hooks:
+        hook(phase, path)
+    return phase, path, time.time(), time.perf_counter()
+
+
+def finish(span, size=None, token_count=None):
+    if span is None:
+        return
+    phase, path, start_time, start_counter = span
+    emit(PhaseEvent(phase, path, start_time, time.perf_counter() - start_counter, size, token_count))
+
+
+def emit(event):
+    """Hands `event` to the registered tracers"""
+    for tracer in _tracers:
+        tracer(event)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Generates a synthetic corpus of QML files, used by the benchmarks.
+
+The generated files exercise all the constructs doxyqml knows about: header
+comments, imports, documented properties, functions, signals and enums,
+inline comments and nested components with and without ids.
+"""
+import argparse
+import os
+import random
+import sys
+
+
+TYPES = ["int", "real", "bool", "string", "var", "color", "list<Item>", "Item"]
+BASE_NAMES = ["Item", "QtObject", "Rectangle", "QQC2.Control", "MouseArea"]
+COMPONENTS = ["Item", "Rectangle", "Text", "Row", "Column", "MouseArea"]
+
+
+class Generator(object):
+    def __init__(self, seed=0, properties=20, functions=10, signals=5, enums=2, components=10, depth=2):
+        self.rng = random.Random(seed)
+        self.properties = properties
+        self.functions = functions
+        self.signals = signals
+        self.enums = enums
+        self.components = components
+        self.depth = depth
+        self.counter = 0
+
+    def identifier(self, prefix):
+        self.counter += 1
+        return "%s%d" % (prefix, self.counter)
+
+    def property(self, indent):
+        type = self.rng.choice(TYPES)
+        name = self.identifier("prop")
+        lst = []
+        if self.rng.random() < 0.5:
+            lst.append("%s/**\n%s * The %s property.\n%s */" % (indent, indent, name, indent))
+            lst.append("%sproperty %s %s" % (indent, type, name))
+        else:
+            keyword = self.rng.choice(["property", "readonly property", "default property"])
+            lst.append("%s%s %s %s: %s //!< Inline doc of %s" % (
+                indent, keyword, type, name, self.rng.choice(['"text"', "42", "null", "[1, 2]"]), name))
+        return lst
+
+    def function(self, indent):
+        name = self.identifier("doSomething")
+        args = [self.identifier("arg") for _ in range(self.rng.randint(0, 4))]
+        lst = ["%s/**" % indent, "%s * Does something with %s." % (indent, name)]
+        for arg in args:
+            lst.append("%s * @param type:%s %s the %s argument" % (indent, self.rng.choice(TYPES), arg, arg))
+        lst.append("%s * @return type:int the result" % indent)
+        lst.append("%s */" % indent)
+        lst.append("%sfunction %s(%s) {" % (indent, name, ", ".join(args)))
+        lst.append('%s    var text = "a {string} with \\"braces\\"";' % indent)
+        lst.append("%s    for (var i = 0; i < 10; ++i) { console.log(i, text); }" % indent)
+        lst.append("%s    return %s;" % (indent, " + ".join(args) or "0"))
+        lst.append("%s}" % indent)
+        return lst
+
+    def signal(self, indent):
+        args = ["%s %s" % (self.rng.choice(TYPES), self.identifier("value"))
+                for _ in range(self.rng.randint(0, 3))]
+        return ["%s/// Emitted when something happens" % indent,
+                "%ssignal %s(%s)" % (indent, self.identifier("happened"), ", ".join(args))]
+
+    def enum(self, indent):
+        values = ["%s%s = %d" % (indent, self.identifier("Value"), i) for i in range(self.rng.randint(2, 6))]
+        return ["%s/// An enum" % indent,
+                "%senum %s {" % (indent, self.identifier("Kind")),
+                ",\n".join("    " + x for x in values),
+                "%s}" % indent]
+
+    def component(self, indent, depth):
+        lst = []
+        has_id = self.rng.random() < 0.3
+        if has_id:
+            lst.append("%s/// A nested component" % indent)
+        lst.append("%s%s {" % (indent, self.rng.choice(COMPONENTS)))
+        inner = indent + "    "
+        if has_id:
+            lst.append("%sid: %s" % (inner, self.identifier("child")))
+        lst.append("%swidth: parent.width / 2" % inner)
+        lst.append("%sanchors.margins: 4" % inner)
+        lst.append("%sonClicked: { console.log(\"clicked\") }" % inner)
+        if depth > 0:
+            for _ in range(self.rng.randint(0, 2)):
+                lst.extend(self.component(inner, depth - 1))
+        lst.append("%s}" % indent)
+        return lst
+
+    def qml(self):
+        lst = [
+            "/*",
+            " * SPDX-FileCopyrightText: 2024 Someone <someone@example.com>",
+            " * SPDX-License-Identifier: BSD-2-Clause",
+            " */",
+            "import QtQuick 2.15",
+            "import QtQuick.Controls 2.15 as QQC2",
+            "",
+            "/**",
+            " * A generated component.",
+            " */",
+            "%s {" % self.rng.choice(BASE_NAMES),
+        ]
+        members = []
+        members += [self.property] * self.properties
+        members += [self.function] * self.functions
+        members += [self.signal] * self.signals
+        members += [self.enum] * self.enums
+        members += [lambda indent: self.component(indent, self.depth)] * self.components
+        self.rng.shuffle(members)
+        for member in members:
+            lst.extend(member("    "))
+            lst.append("")
+        lst.append("}")
+        return "\n".join(lst) + "\n"
+
+
+def write_module(directory, files=100, module="Generated.Module", internal_ratio=0.1, seed=0, **kwargs):
+    """
+    Writes `files` QML files and a qmldir declaring them in `directory`.
+    Returns the list of written QML paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    qmldir = ["module %s" % module]
+    for idx in range(files):
+        generator = Generator(seed=seed + idx, **kwargs)
+        name = "Type%d" % idx
+        file_name = name + ".qml"
+        path = os.path.join(directory, file_name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generator.qml())
+        paths.append(path)
+        if idx < files * internal_ratio:
+            qmldir.append("internal %s %s" % (name, file_name))
+        else:
+            qmldir.append("%s 1.0 %s" % (name, file_name))
+    with open(os.path.join(directory, "qmldir"), "w", encoding="utf-8") as f:
+        f.write("\n".join(qmldir) + "\n")
+    return paths
+
+
+def generate_texts(files=100, seed=0, **kwargs):
+    return [Generator(seed=seed + idx, **kwargs).qml() for idx in range(files)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic QML module")
+    parser.add_argument("-n", "--files", type=int, default=100,
+                        help="Number of QML files to generate (%(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("directory", help="Where to write the module")
+    args = parser.parse_args()
+
+    write_module(args.directory, files=args.files, seed=args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
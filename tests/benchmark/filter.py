@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Times doxyqml on a generated module tree with the ways it can be invoked:
+- subprocess: one doxyqml process per file, as Doxygen FILTER_PATTERNS does,
+- import: one in-process call per file, as a persistent process would do,
+- batch: one doxyqml process converting the whole tree, in one process, in
+  worker processes, in worker threads or to aggregated outputs.
+
+The total time, the time per file and, for strategies converting one file at
+a time, the latency percentiles are reported. The startup share is the part of
+the total time spent starting doxyqml processes, measured with
+`doxyqml --version`.
+
+The per-file strategies reuse the runners of the functional tests.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import corpus
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functional"))
+from tests import ImportRunner, SubprocessRunner  # noqa: E402
+
+
+def generate_tree(directory, files, modules):
+    paths = []
+    for idx in range(modules):
+        paths += corpus.write_module(os.path.join(directory, "Module%d" % idx), files=files // modules,
+                                     module="Generated.Module%d" % idx, seed=idx * files)
+    return paths
+
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def measure_startup(executable, repeat=5):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.call([executable, "--version"], stdout=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def run_per_file(runner, paths, root):
+    """Returns the duration of each conversion"""
+    durations = []
+    with open(os.devnull, "w") as devnull:
+        for path in paths:
+            start = time.perf_counter()
+            ret = runner.run(path, [], devnull, root)
+            durations.append(time.perf_counter() - start)
+            if ret != 0:
+                raise RuntimeError("Failed to convert %s" % path)
+    return durations
+
+
+def run_batch(executable, options, root, output_dir):
+    shutil.rmtree(output_dir, ignore_errors=True)
+    ret = subprocess.call([executable, "-o", "cpp=" + output_dir, root] + options)
+    if ret != 0:
+        raise RuntimeError("Failed to convert %s" % root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--files", type=int, default=200,
+                        help="Number of QML files to generate (%(default)s)")
+    parser.add_argument("--modules", type=int, default=4,
+                        help="Number of modules the files are spread over (%(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of workers of the parallel batch strategies (%(default)s)")
+    parser.add_argument("--doxyqml", default="doxyqml",
+                        help="Path to the doxyqml executable (%(default)s)")
+    args = parser.parse_args()
+
+    batches = [
+        ("batch", []),
+        ("batch -j %d" % args.jobs, ["-j", str(args.jobs)]),
+        ("batch -j %d --threads" % args.jobs, ["-j", str(args.jobs), "--threads"]),
+        ("batch --aggregate", ["--aggregate"]),
+    ]
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        root = os.path.join(tmp_dir, "src")
+        paths = generate_tree(root, args.files, args.modules)
+        startup = measure_startup(args.doxyqml)
+
+        print("Files:   %d in %d modules" % (len(paths), args.modules))
+        print("Startup: %.1f ms" % (startup * 1000))
+        print("%-24s %9s %9s %9s %9s %9s %8s" % ("strategy", "total s", "file ms", "p50 ms", "p90 ms", "p99 ms",
+                                                 "startup"))
+
+        def report(name, total, durations, process_count):
+            if durations:
+                latencies = tuple(percentile(durations, x) * 1000 for x in (0.5, 0.9, 0.99))
+                latency_text = "%9.1f %9.1f %9.1f" % latencies
+            else:
+                latency_text = "%9s %9s %9s" % ("-", "-", "-")
+            print("%-24s %9.2f %9.1f %s %7.0f%%" % (name, total, total * 1000 / len(paths), latency_text,
+                                                    100 * startup * process_count / total))
+
+        for name, runner, process_count in [
+                ("subprocess", SubprocessRunner(args.doxyqml), len(paths)),
+                ("import", ImportRunner(), 0)]:
+            start = time.perf_counter()
+            durations = run_per_file(runner, paths, root)
+            report(name, time.perf_counter() - start, durations, process_count)
+
+        for name, options in batches:
+            start = time.perf_counter()
+            run_batch(args.doxyqml, options, root, os.path.join(tmp_dir, "output"))
+            report(name, time.perf_counter() - start, None, 1)
+    finally:
+        shutil.rmtree(tmp_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Times the lexer on adversarial inputs of growing size. For each input the
+time is printed for every size, together with the ratio to the time of the
+previous size: with sizes doubling, a ratio close to 2 means linear time, a
+ratio close to 4 quadratic time.
+"""
+import argparse
+import sys
+import timeit
+
+from doxyqml.lexer import Lexer
+
+import corpus
+
+
+def long_string(n):
+    return 'Item { property string json: "%s" }\n' % ('{\\"key\\": [1, 2, {\\"a\\": \\"b\\"}]}, ' * (n // 30))
+
+
+def unterminated_quotes(n):
+    return 'Item {\n' + 'x: a"b\n' * (n // 7) + '}\n'
+
+
+def unterminated_block_comments(n):
+    return 'Item {\n' + 'x: a /* b\n' * (n // 10) + '}\n'
+
+
+def license_block(n):
+    return "/*\n" + " * Licensed under the terms of some license, see LICENSE.\n" * (n // 60) + " */\nItem {}\n"
+
+
+def line_comments(n):
+    return "Item {\n" + "    // A long explanation split on many lines\n" * (n // 45) + "}\n"
+
+
+def long_line(n):
+    return "Item { x: [" + "1, " * (n // 3) + "] }\n"
+
+
+def generated(n):
+    text = corpus.Generator().qml()
+    return text * max(1, n // len(text))
+
+
+INPUTS = [
+    ("long string", long_string),
+    ("unterminated quotes", unterminated_quotes),
+    ("unterminated block comments", unterminated_block_comments),
+    ("license block", license_block),
+    ("line comments", line_comments),
+    ("long line", long_line),
+    ("generated", generated),
+]
+
+
+def tokenize(text):
+    lexer = Lexer(text)
+    lexer.tokenize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, default=4,
+                        help="Number of input sizes, doubling each time (%(default)s)")
+    parser.add_argument("--start", type=int, default=25000,
+                        help="Size of the smallest input, in characters (%(default)s)")
+    args = parser.parse_args()
+
+    for name, generate in INPUTS:
+        print(name)
+        previous = None
+        for idx in range(args.sizes):
+            text = generate(args.start * 2 ** idx)
+            duration = min(timeit.repeat(lambda: tokenize(text), number=1, repeat=3))
+            ratio = " (x%.1f)" % (duration / previous) if previous else ""
+            print("    %9d chars: %8.1f ms%s" % (len(text), duration * 1000, ratio))
+            previous = duration
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Counts, over a corpus, how many times each tokenizer of the lexer is tried,
+matches and produces a token, and the number of tokens and characters of
+each token type. Tokenizers tried much more often than they match are the
+ones worth reordering or guarding with a fast path.
+
+QML files are read from the given files and directories, the synthetic
+corpus is used if there are none.
+"""
+import argparse
+import os
+import sys
+
+from doxyqml.lexer import Lexer, LexerStats
+
+import corpus
+
+
+def list_texts(paths):
+    for path in paths:
+        if not os.path.isdir(path):
+            with open(path, encoding="utf-8") as f:
+                yield f.read()
+            continue
+        for root, dirs, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".qml"):
+                    with open(os.path.join(root, name), encoding="utf-8") as f:
+                        yield f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--files", type=int, default=200,
+                        help="Number of QML files to generate without paths (%(default)s)")
+    parser.add_argument("paths", nargs="*", metavar="path",
+                        help="QML files or directories to tokenize")
+    args = parser.parse_args()
+
+    texts = list_texts(args.paths) if args.paths else corpus.generate_texts(args.files)
+    stats = LexerStats()
+    for text in texts:
+        Lexer(text, stats).tokenize()
+    print(stats.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Measures the memory used by parsed QML models kept alive, as a batch or
+server process does. With `--compare REVISION`, the measure is also run on the
+doxyqml package of a git revision, for example the one before a change to the
+model classes.
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from doxyqml import qmlparser
+from doxyqml.lexer import Lexer
+from doxyqml.qmlclass import QmlClass
+
+import corpus
+import revision
+
+
+def parse(text, idx):
+    lexer = Lexer(text)
+    lexer.tokenize()
+    qml_class = QmlClass("Generated.Module.Type%d" % idx, "1.0", "Generated.Module")
+    qmlparser.parse(lexer.tokens, qml_class)
+    return qml_class
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--files", type=int, default=1000,
+                        help="Number of QML files to parse (%(default)s)")
+    parser.add_argument("--compare", metavar="REVISION",
+                        help="Also measure the doxyqml package of this git revision")
+    args = parser.parse_args()
+
+    if args.compare:
+        return revision.run_compared(__file__, ["-n", str(args.files)], args.compare)
+
+    texts = corpus.generate_texts(args.files)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    classes = [parse(text, idx) for idx, text in enumerate(texts)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print("Parsed classes:     %d" % len(classes))
+    print("Retained:           %.1f KiB" % (retained / 1024))
+    print("Retained per class: %.1f KiB" % (retained / 1024 / len(classes)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""
+Times the QML parser on the synthetic corpus. Files are tokenized beforehand
+so that only parsing is measured. With `--compare REVISION`, the parser of a
+git revision is timed too, for example the one before a parser change.
+"""
+import argparse
+import sys
+import timeit
+
+from doxyqml import qmlparser
+from doxyqml.lexer import Lexer
+from doxyqml.qmlclass import QmlClass
+
+import corpus
+import revision
+
+
+def tokenize(text):
+    lexer = Lexer(text)
+    lexer.tokenize()
+    return lexer.tokens
+
+
+def parse_all(token_lists, kwargs):
+    for tokens in token_lists:
+        qml_class = QmlClass("Generated.Module.Type")
+        qmlparser.parse(tokens, qml_class, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--files", type=int, default=200,
+                        help="Number of QML files to parse (%(default)s)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of runs, the fastest one is reported (%(default)s)")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Parse nested component bodies lazily")
+    parser.add_argument("--compare", metavar="REVISION",
+                        help="Also time the parser of this git revision")
+    args = parser.parse_args()
+
+    if args.compare:
+        argv = ["-n", str(args.files), "--repeat", str(args.repeat)]
+        if args.lazy:
+            argv.append("--lazy")
+        return revision.run_compared(__file__, argv, args.compare)
+
+    # Revisions older than lazy parsing do not know the argument
+    kwargs = {"lazy_components": True} if args.lazy else {}
+
+    token_lists = [tokenize(x) for x in corpus.generate_texts(args.files)]
+    token_count = sum(len(x) for x in token_lists)
+
+    duration = min(timeit.repeat(lambda: parse_all(token_lists, kwargs), number=1, repeat=args.repeat))
+    print("Files:          %d" % args.files)
+    print("Tokens:         %d" % token_count)
+    print("Total:          %.1f ms" % (duration * 1000))
+    print("Per 1k tokens:  %.3f ms" % (duration * 1000000 / token_count))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# vi: ts=4 sw=4 et
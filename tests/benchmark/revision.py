@@ -0,0 +1,39 @@
+"""
+Runs a benchmark script on the doxyqml package of another git revision, to
+compare it with the working tree.
+"""
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def extract(revision, directory):
+    """Extracts the doxyqml package of git `revision` to `directory`"""
+    archive = subprocess.run(["git", "archive", revision, "doxyqml"], cwd=REPO_DIR, check=True,
+                             stdout=subprocess.PIPE).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def run_compared(script, argv, revision):
+    """
+    Runs `script` with `argv` on the working tree, then on `revision`, each
+    run in its own process. Returns 0 if both runs succeed.
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        extract(revision, tmp_dir)
+        ret = 0
+        for label, path in ("working tree", REPO_DIR), (revision, tmp_dir):
+            print("== %s ==" % label, flush=True)
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join([path] + sys.path[1:]))
+            ret = subprocess.call([sys.executable, script] + argv, env=env) or ret
+        return ret
+    finally:
+        shutil.rmtree(tmp_dir)
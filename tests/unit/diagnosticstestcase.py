@@ -0,0 +1,17 @@
+from unittest import TestCase
+
+from doxyqml.diagnostics import LineTable
+
+
+class LineTableTestCase(TestCase):
+    def test_coord(self):
+        text = "ab\ncde\n\nf"
+        table = LineTable(text)
+        for idx in range(len(text) + 1):
+            head = text[:idx]
+            expected = (head.count("\n") + 1, len(head) - (head.rfind("\n") + 1) + 1)
+            self.assertEqual(table.coord(idx), expected, idx)
+
+    def test_line(self):
+        table = LineTable("ab\ncde\n\nf")
+        self.assertEqual([table.line(x) for x in range(1, 5)], ["ab", "cde", "", "f"])
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from doxyqml import formats, main, qmlparser
+from doxyqml.lexer import Lexer
+from doxyqml.qmlclass import QmlClass
+
+
+SRC = """import QtQuick 2.0
+/// The class
+Item {
+    /// A property
+    property int count: 3
+    /**
+     * @param type:int a first
+     * @return type:int the sum
+     */
+    function add(a, b) {}
+    signal changed(string value)
+    enum Color { Red, Green = 2 }
+    Item {
+        Rectangle {
+            id: grandChild
+        }
+    }
+}
+"""
+
+
+class FormatsTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_describe_class(self):
+        lexer = Lexer(SRC)
+        lexer.tokenize()
+        qmlclass = QmlClass("Mod.Foo")
+        qmlparser.parse(lexer.tokens, qmlclass)
+
+        description = json.loads(formats.render_json(qmlclass))
+
+        self.assertEqual(description["name"], "Mod.Foo")
+        self.assertEqual(description["base_name"], "QtQuick.Item")
+        self.assertEqual(description["properties"][0]["name"], "count")
+        self.assertEqual(description["properties"][0]["doc"], "/// A property")
+        self.assertEqual(description["functions"][0]["type"], "int")
+        self.assertEqual(description["functions"][0]["args"][0]["type"], "int")
+        self.assertEqual(description["signals"][0]["args"][0]["type"], "string")
+        self.assertEqual([x["name"] for x in description["enums"][0]["enumerators"]], ["Red", "Green"])
+        self.assertEqual(description["components"], [{"id": "grandChild", "type": "Rectangle", "doc": None}])
+
+    def test_several_outputs_from_one_parse(self):
+        input_dir = os.path.join(self.tmp_dir, "input")
+        os.makedirs(os.path.join(input_dir, "sub"))
+        for name in "Foo.qml", os.path.join("sub", "Bar.qml"):
+            with open(os.path.join(input_dir, name), "w") as f:
+                f.write(SRC)
+        cpp_dir = os.path.join(self.tmp_dir, "cpp")
+        json_dir = os.path.join(self.tmp_dir, "json")
+
+        with mock.patch.object(qmlparser, "parse", wraps=qmlparser.parse) as parse:
+            ret = main.main(["-o", "cpp=" + cpp_dir, "-o", "json=" + json_dir, input_dir])
+
+        self.assertEqual(ret, 0)
+        self.assertEqual(parse.call_count, 2)
+        for name in "Foo.qml", os.path.join("sub", "Bar.qml"):
+            self.assertTrue(os.path.isfile(os.path.join(cpp_dir, name + ".cpp")))
+            with open(os.path.join(json_dir, name + ".json")) as f:
+                self.assertEqual(json.load(f)["class_name"], os.path.basename(name)[:-4])
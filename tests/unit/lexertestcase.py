@@ -1,7 +1,7 @@
 from unittest import TestCase
 
-from doxyqml.lexer import Lexer, Token, IMPORT, PRAGMA, STRING, COMMENT, KEYWORD, ELEMENT, \
-    BLOCK_START, BLOCK_END, COMPONENT, CHAR
+from doxyqml.lexer import Lexer, LexerStats, Token, TOKENIZERS, IMPORT, PRAGMA, STRING, COMMENT, KEYWORD, ELEMENT, \
+    BLOCK_START, BLOCK_END, COMPONENT, CHAR, ATTRIBUTE
 
 
 class LexerTestCase(TestCase):
@@ -75,3 +75,55 @@ class LexerTestCase(TestCase):
         lexer = Lexer(src)
         lexer.tokenize()
         self.assertEqual(lexer.tokens[9], Token(BLOCK_END, '}', 31, 31))
+
+    def test_unterminated_strings(self):
+        src = "a: \"b\" + \"c\\\" + 'd\n"
+        lexer = Lexer(src)
+        lexer.tokenize()
+        self.assertEqual(lexer.tokens[2], Token(STRING, '"b"', 3, 3))
+        self.assertEqual(lexer.tokens[4], Token(CHAR, '"', 9, 9))
+        self.assertEqual(lexer.tokens[7], Token(CHAR, '"', 12, 12))
+        self.assertEqual(lexer.tokens[9], Token(CHAR, "'", 16, 16))
+
+    def test_unterminated_block_comment(self):
+        src = "/* a */ b /* c\nd */ e /* f\ng"
+        lexer = Lexer(src)
+        lexer.tokenize()
+        self.assertEqual(lexer.tokens[0], Token(COMMENT, "/* a */", 0, 0))
+        self.assertEqual(lexer.tokens[2], Token(COMMENT, "/* c\nd */", 10, 10))
+        self.assertEqual(lexer.tokens[4], Token(CHAR, "/", 22, 7))
+        self.assertEqual(lexer.tokens[5], Token(CHAR, "*", 23, 8))
+
+    def test_continued_line_comments(self):
+        src = "// a\n  // b\n\t// c\nd // e\n"
+        lexer = Lexer(src)
+        lexer.tokenize()
+        self.assertEqual(lexer.tokens[0], Token(COMMENT, "// a\n  // b\n\t// c", 0, 0))
+        self.assertEqual(lexer.tokens[2], Token(COMMENT, "// e", 20, 2))
+
+    def test_column_on_long_line(self):
+        src = "a\n" + "b, " * 1000 + "c"
+        lexer = Lexer(src)
+        lexer.tokenize()
+        self.assertEqual(lexer.tokens[-1], Token(ELEMENT, "c", 3002, 3000))
+
+    def test_stats(self):
+        src = 'Item {\n    x: "a" // b\n}\n'
+        stats = LexerStats()
+        lexer = Lexer(src, stats)
+        lexer.tokenize()
+        Lexer(src, stats).tokenize()
+        reference = Lexer(src)
+        reference.tokenize()
+
+        self.assertEqual(lexer.tokens, reference.tokens)
+        self.assertEqual(stats.file_count, 2)
+        self.assertEqual(stats.token_counts, {COMPONENT: 2, BLOCK_START: 2, ATTRIBUTE: 2, STRING: 2,
+                                              CHAR: 2, COMMENT: 2, BLOCK_END: 2})
+        self.assertEqual(stats.token_chars[STRING], 6)
+        self.assertEqual(sum(stats.accepted.values()), 14)
+        # The string tokenizer is also tried where the comment tokenizers fail
+        string_tokenizer = [x for x in TOKENIZERS if x.token_type == STRING][0]
+        self.assertEqual(stats.matched[string_tokenizer], 2)
+        self.assertGreater(stats.tried[string_tokenizer], stats.matched[string_tokenizer])
+        self.assertIn("string", stats.format())
@@ -0,0 +1,290 @@
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from doxyqml import main
+from doxyqml.formats import FORMATS
+from doxyqml.qmldir import ClassInfo
+
+
+class ReadFileListTestCase(TestCase):
+    def test_read(self):
+        stream = io.BufferedReader(io.BytesIO(b"a.qml\0sub dir/b.qml\0\0c.qml"))
+        self.assertEqual(list(main.read_file_list(stream)), ["a.qml", "sub dir/b.qml", "c.qml"])
+
+    def test_streaming(self):
+        read_fd, write_fd = os.pipe()
+        with open(read_fd, "rb") as stream, open(write_fd, "wb", buffering=0) as writer:
+            paths = main.read_file_list(stream)
+            writer.write(b"a.qml\0b")
+            # Returned before the end of the list
+            self.assertEqual(next(paths), "a.qml")
+            writer.write(b".qml\0")
+            writer.close()
+            self.assertEqual(list(paths), ["b.qml"])
+
+
+class FilesFromTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def convert(self, jobs, *options):
+        output_dir = "output%d%s" % (jobs, "".join(options))
+        ret = main.main(["--files-from", "list", "-j", str(jobs), "-o", "cpp=" + output_dir] + list(options),
+                        out=io.TextIOWrapper(io.BytesIO()))
+        self.assertEqual(ret, 0)
+        result = {}
+        for root, dirs, files in os.walk(output_dir):
+            for name in files:
+                with open(os.path.join(root, name)) as f:
+                    result[os.path.relpath(os.path.join(root, name), output_dir)] = f.read()
+        return result
+
+    def test_files_from(self):
+        names = [os.path.join("src", "Type%d.qml" % x) for x in range(10)]
+        os.makedirs("src")
+        for name in names:
+            with open(name, "w") as f:
+                f.write("Item {\n    property int count\n}\n")
+        with open(os.path.join("src", "Ignored.qml"), "w") as f:
+            f.write("Item {}\n")
+        with open("list", "wb") as f:
+            f.write(b"\0".join(os.fsencode(x) for x in names) + b"\0")
+
+        result = self.convert(1)
+        self.assertEqual(sorted(result), sorted(x + ".cpp" for x in names))
+        self.assertEqual(self.convert(3), result)
+        self.assertEqual(self.convert(3, "--threads"), result)
+
+    def test_output_name(self):
+        self.assertEqual(main.get_output_name(os.path.join("a", "..", "b.qml")), "b.qml")
+        self.assertEqual(main.get_output_name(os.path.join(self.tmp_dir, "a.qml")), "a.qml")
+        outside = os.path.join(os.path.dirname(self.tmp_dir), "c.qml")
+        self.assertEqual(main.get_output_name(outside), outside.lstrip(os.sep))
+
+
+class AggregateTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_aggregate(self):
+        qmldir = self.write("Foo/qmldir", "module Foo\nA 1.0 A.qml\nB 1.0 B.qml\n")
+        a = self.write("Foo/A.qml", "Item {}\n")
+        b = self.write("Foo/B.qml", "Item {}\n")
+        c = self.write("C.qml", "Item {}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        ret = main.main(["--aggregate", "--qmldir", qmldir, c, "-o", "cpp=" + output_dir],
+                        out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["Foo.cpp", "global.cpp"])
+        with open(os.path.join(output_dir, "Foo.cpp")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], '#line 1 "%s"' % a)
+        self.assertEqual(lines.count("namespace Foo {"), 2)
+        self.assertIn('#line 1 "%s"' % b, lines)
+        with open(os.path.join(output_dir, "global.cpp")) as f:
+            self.assertIn("class C : public QtQuick.Item {", f.read())
+
+    def test_aggregate_json(self):
+        c = self.write("C.qml", "Item {}\n")
+        ret = main.main(["--aggregate", c, "-o", "json=" + self.tmp_dir], out=io.TextIOWrapper(io.BytesIO()))
+        self.assertEqual(ret, -1)
+
+
+class ClassResolutionTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_internal_files_not_read(self):
+        self.write("qmldir", "module Foo\nA 1.0 A.qml\nB 1.0 B.qml\ninternal Detail Detail.qml\n")
+        paths = [self.write(x + ".qml", "Item {}\n") for x in ("A", "B")]
+        detail = self.write("Detail.qml", "Item {}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        with mock.patch.object(main, "read_qml_file", wraps=main.read_qml_file) as read_qml_file, \
+                mock.patch.object(main, "read_qmldir", wraps=main.read_qmldir) as read_qmldir:
+            ret = main.main(paths + [detail, "-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual([x[0][0] for x in read_qml_file.call_args_list], paths)
+        # Read once for all files
+        self.assertEqual(read_qmldir.call_count, 1)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["A.qml.cpp", "B.qml.cpp"])
+
+    def test_single_file(self):
+        self.write("qmldir", "module Foo\ninternal Detail Detail.qml\n")
+        detail = self.write("Detail.qml", "Item {}\n")
+        out = io.TextIOWrapper(io.BytesIO())
+        with mock.patch.object(main, "read_qml_file") as read_qml_file:
+            self.assertEqual(main.main([detail], out=out), 0)
+        self.assertFalse(read_qml_file.called)
+        out.flush()
+        self.assertEqual(out.buffer.getvalue(), b"")
+
+
+class CheckTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def check(self, *args):
+        out = io.TextIOWrapper(io.BytesIO())
+        ret = main.main(["--check"] + list(args), out=out)
+        out.flush()
+        return ret, out.buffer.getvalue().decode("utf-8")
+
+    def test_check(self):
+        self.write("A.qml", "Item {\n    property int count\n}\n")
+        ret, text = self.check(self.tmp_dir, "-o", "cpp=-")
+        self.assertEqual(ret, 0)
+        self.assertEqual(text, "")
+
+        # Errors of nested components and of every file are reported
+        bad = self.write("B.qml", "Item {\n    Component {\n        Item {\n            property int\n"
+                                  "        }\n    }\n}\n")
+        self.write("C.qml", "Item {\n    signal\n}\n")
+        ret, text = self.check(self.tmp_dir, "-j", "2")
+        self.assertEqual(ret, -1)
+        lines = text.splitlines()
+        self.assertEqual(len(lines), 3, text)
+        self.assertTrue(lines[0].startswith(bad + ":5:9: "), lines[0])
+        self.assertEqual(lines[-1], "2 error(s) in 2 of 3 file(s)")
+
+    def test_internal_files(self):
+        self.write("qmldir", "module Foo\nA 1.0 A.qml\ninternal Detail Detail.qml\n")
+        self.write("A.qml", "Item {}\n")
+        detail = self.write("Detail.qml", "Item {\n    signal\n}\n")
+        for args in [self.tmp_dir], [detail], ["--qmldir", os.path.join(self.tmp_dir, "qmldir")]:
+            ret, text = self.check(*args)
+            self.assertEqual(ret, -1, args)
+            self.assertTrue(text.startswith(detail + ":3:1: "), text)
+
+    def test_default_jobs(self):
+        self.write("A.qml", "Item {}\n")
+        profile = os.path.join(self.tmp_dir, "prof")
+        for options, jobs in [
+                ([], 4),
+                (["-j", "2"], 2),
+                (["--threads"], 4),
+                # Options which need files to be converted in this process
+                (["--memory-report"], 1),
+                (["--split-jobs", "2"], 1),
+                (["--profile", profile, "--threads"], 1),
+                ]:
+            with mock.patch("os.cpu_count", return_value=4), mock.patch("sys.stderr"), \
+                    mock.patch.object(main, "convert_files", wraps=main.convert_files) as convert_files, \
+                    mock.patch("logging.warning") as warning:
+                ret, text = self.check(self.tmp_dir, *options)
+            self.assertEqual(ret, 0)
+            self.assertEqual(convert_files.call_args[0][5], jobs, options)
+            self.assertFalse(warning.called, options)
+
+    def test_nothing_written(self):
+        path = self.write("A.qml", "Item {}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+        with mock.patch.object(main, "render") as render:
+            ret, text = self.check(path, "-o", "cpp=" + output_dir)
+        self.assertEqual(ret, 0)
+        self.assertEqual(text, "")
+        self.assertFalse(render.called)
+        self.assertFalse(os.path.exists(output_dir))
+
+
+class DeferredErrorTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_error_in_component_body(self):
+        path = os.path.join(self.tmp_dir, "A.qml")
+        with open(path, "w") as f:
+            f.write("Item {\n    Row {\n        component C: Item {\n            property int\n        }\n"
+                    "    }\n}\n")
+
+        def render(qml_class):
+            for component in qml_class.get_components():
+                component.load_body()
+            return ""
+
+        # The body of Row is only parsed when rendered
+        fmt = mock.Mock(extension=".cpp", source_hint=None, render=render)
+        with mock.patch.dict(FORMATS, {"cpp": fmt}), self.assertLogs(level="ERROR") as logs:
+            ret = main.main([path], out=io.TextIOWrapper(io.BytesIO()))
+        self.assertEqual(ret, -1)
+        self.assertEqual(logs.output[0], "ERROR:root:Failed to parse %s" % path)
+        self.assertIn("line 5", logs.output[1])
+
+
+class ConcurrentConversionTestCase(TestCase):
+    """Converts the same files from many threads at once"""
+    def setUp(self):
+        switch_interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        # Switch threads as often as possible to interleave conversions
+        sys.setswitchinterval(1e-6)
+
+    def convert(self, path, text):
+        args = main.parse_args([path])
+        class_info = ClassInfo(os.path.basename(path)[:-4], None, "", False)
+        qml_class = main.load_qml_class(path, args, class_info=class_info, text=text)
+        return [FORMATS[x].render(qml_class) for x in ("cpp", "json")]
+
+    def test_concurrent_conversions(self):
+        functional_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functional")
+        files = []
+        for path in sorted(glob.glob(os.path.join(functional_dir, "*", "input", "*.qml"))):
+            with open(path, encoding="utf-8") as f:
+                files.append((path, f.read()))
+        self.assertTrue(files)
+        # Some files are documented with unknown arguments on purpose
+        with self.assertLogs(level="WARNING") as serial_logs:
+            expected = [self.convert(path, text) for path, text in files]
+
+        with self.assertLogs(level="WARNING") as logs, ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(self.convert, path, text) for path, text in files * 20]
+            results = [x.result() for x in futures]
+
+        self.assertEqual(results, expected * 20)
+        self.assertEqual(sorted(logs.output), sorted(serial_logs.output * 20))
@@ -0,0 +1,87 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+from unittest import TestCase, mock
+
+from doxyqml import main, tracing
+from doxyqml.lexer import Lexer
+from doxyqml.memoryreport import MemoryReport
+
+
+class MemoryReportTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_phases(self):
+        report = MemoryReport()
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with tracing.use_tracer(report), tracing.current_file("Foo.qml"):
+            lexer = Lexer("Item {\n" + "    property int count\n" * 100 + "}\n")
+            lexer.tokenize()
+
+        file_memory = report.files["Foo.qml"]
+        self.assertEqual(list(file_memory.phases), [tracing.TOKENIZE, tracing.FIXUP_TOKENS])
+        self.assertEqual(file_memory.token_count, len(lexer.tokens))
+        # At least a pointer per token
+        self.assertGreater(file_memory.get_token_list_size(), len(lexer.tokens) * 8)
+        self.assertGreaterEqual(file_memory.phases[tracing.TOKENIZE].peak,
+                                file_memory.phases[tracing.TOKENIZE].retained)
+        self.assertEqual(file_memory.get_model_size(), 0)
+
+    def test_without_reset_peak(self):
+        report = MemoryReport()
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with mock.patch("doxyqml.memoryreport.HAS_RESET_PEAK", False), \
+                tracing.use_tracer(report), tracing.current_file("Foo.qml"):
+            lexer = Lexer("Item {\n" + "    property int count\n" * 100 + "}\n")
+            lexer.tokenize()
+
+        phase_memory = report.files["Foo.qml"].phases[tracing.TOKENIZE]
+        self.assertEqual(phase_memory.peak, phase_memory.retained)
+
+    def test_main(self):
+        paths = []
+        for idx in range(3):
+            paths.append(os.path.join(self.tmp_dir, "Type%d.qml" % idx))
+            with open(paths[-1], "w") as f:
+                f.write("Item {\n" + "    property int count\n" * 10 ** idx + "}\n")
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            ret = main.main(["--memory-report"] + paths + ["-o", "cpp=" + os.path.join(self.tmp_dir, "output")],
+                            out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertFalse(tracing.is_tracing())
+        lines = stderr.getvalue().splitlines()
+        self.assertIn("%s: 6 tokens, token list" % paths[0], "\n".join(lines))
+        for phase in tracing.READ, tracing.TOKENIZE, tracing.FIXUP_TOKENS, tracing.PARSE, tracing.RENDER:
+            self.assertEqual(len([x for x in lines if x.split()[0] == phase]), 3)
+        # The largest file comes first
+        self.assertEqual(lines[lines.index("Highest peaks:") + 1].split()[1], paths[2])
+
+    def test_skipped_files(self):
+        with open(os.path.join(self.tmp_dir, "qmldir"), "w") as f:
+            f.write("module Foo\nA 1.0 A.qml\ninternal Detail Detail.qml\n")
+        for name in "A.qml", "Detail.qml":
+            with open(os.path.join(self.tmp_dir, name), "w") as f:
+                f.write("Item {}\n")
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            ret = main.main(["--memory-report", self.tmp_dir, "-o", "cpp=" + os.path.join(self.tmp_dir, "output")],
+                            out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        lines = stderr.getvalue().splitlines()
+        self.assertIn("%s: skipped" % os.path.join(self.tmp_dir, "Detail.qml"), lines)
+        self.assertNotIn("None", stderr.getvalue())
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from doxyqml import modelcache
+from doxyqml.lexer import Lexer
+from doxyqml.modelcache import ModelCache
+from doxyqml.qmlclass import QmlClass
+from doxyqml import qmlparser
+
+
+SRC = """import QtQuick 2.0 as Q
+pragma Singleton
+/// The class
+Q.Item {
+    /// A property
+    readonly property int count: 3
+    property string name //!< inline doc
+    /**
+     * Adds things
+     * @param type:int a first
+     * @return type:int the sum
+     */
+    function add(a, b = [], ...rest) {}
+    signal changed(string value)
+    enum Color { Red, Green = 2 /**< green */ }
+    component Inner: Text {
+        property int size
+    }
+    Item {
+        id: child
+        Rectangle { id: grandChild }
+    }
+}
+// footer
+"""
+
+
+def parse(src):
+    lexer = Lexer(src)
+    lexer.tokenize()
+    qmlclass = QmlClass("Foo", "1.0", "Mod")
+    qmlparser.parse(lexer.tokens, qmlclass)
+    return qmlclass
+
+
+class ModelCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        data = modelcache.dumps(parse(SRC))
+
+        restored = QmlClass("Foo", "1.0", "Mod")
+        modelcache.restore_class(restored, modelcache.loads(data))
+
+        self.assertEqual(str(restored), str(parse(SRC)))
+
+    def test_version_mismatch(self):
+        data = modelcache.dumps(parse(SRC))
+        data = data.replace(modelcache.__version__.encode("utf-8"), b"0.0.0")
+        self.assertIsNone(modelcache.loads(data))
+
+    def test_corrupted_data(self):
+        self.assertIsNone(modelcache.loads(b"garbage"))
+        self.assertIsNone(modelcache.loads(modelcache.MAGIC + b"\xff"))
+
+    def test_cache(self):
+        cache = ModelCache(os.path.join(self.tmp_dir, "cache"))
+        key = cache.key(SRC)
+        self.assertIsNone(cache.load(key))
+
+        cache.store(key, parse(SRC))
+        self.assertIsNotNone(cache.load(key))
+
+        self.assertNotEqual(cache.key(SRC, parse_sub_classes=False), key)
+        self.assertNotEqual(cache.key(SRC + "\n"), key)
@@ -0,0 +1,84 @@
+import io
+import os
+import pstats
+import shutil
+import tempfile
+from unittest import TestCase
+
+from doxyqml import main
+from doxyqml.profiling import collapse_stacks
+
+
+A = ("a.py", 1, "a")
+B = ("b.py", 2, "b")
+C = ("c.py", 3, "c")
+
+
+class CollapseStacksTestCase(TestCase):
+    def test_collapse_stacks(self):
+        # a calls b and c, b also calls c
+        stats = {
+            A: (1, 1, 1.0, 10.0, {}),
+            B: (1, 1, 2.0, 5.0, {A: (1, 1, 2.0, 5.0)}),
+            C: (2, 2, 7.0, 7.0, {A: (1, 1, 4.0, 4.0), B: (1, 1, 3.0, 3.0)}),
+        }
+        self.assertEqual(collapse_stacks(stats), [
+            ("a (a.py:1)", 1000000),
+            ("a (a.py:1);b (b.py:2)", 2000000),
+            ("a (a.py:1);b (b.py:2);c (c.py:3)", 3000000),
+            ("a (a.py:1);c (c.py:3)", 4000000),
+        ])
+
+    def test_recursion(self):
+        stats = {
+            A: (1, 1, 1.0, 2.0, {}),
+            B: (2, 1, 1.0, 1.0, {A: (1, 1, 0.5, 1.0), B: (1, 1, 0.5, 0.5)}),
+        }
+        self.assertEqual(collapse_stacks(stats), [("a (a.py:1)", 1000000), ("a (a.py:1);b (b.py:2)", 1000000)])
+
+
+class ProfileOptionTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_profile(self):
+        paths = []
+        for idx in range(4):
+            paths.append(os.path.join(self.tmp_dir, "Type%d.qml" % idx))
+            with open(paths[-1], "w") as f:
+                f.write("Item {\n    property int count\n}\n")
+        profile_path = os.path.join(self.tmp_dir, "profile")
+
+        for jobs in "1", "2":
+            ret = main.main(["--profile", profile_path, "-j", jobs] + paths
+                            + ["-o", "cpp=" + os.path.join(self.tmp_dir, "output")],
+                            out=io.TextIOWrapper(io.BytesIO()))
+            self.assertEqual(ret, 0)
+
+            stats = pstats.Stats(profile_path).stats
+            convert_file = [x for x in stats if x[2] == "convert_file"]
+            # Called once per file, whatever the process
+            self.assertEqual(stats[convert_file[0]][1], len(paths))
+            with open(profile_path + ".collapsed") as f:
+                lines = f.read().splitlines()
+            self.assertTrue(any(x.startswith("convert_file (main.py:") for x in lines))
+            for line in lines:
+                stack, count = line.rsplit(" ", 1)
+                self.assertGreater(int(count), 0)
+
+    def test_empty_batch(self):
+        src_dir = os.path.join(self.tmp_dir, "src")
+        os.mkdir(src_dir)
+        profile_path = os.path.join(self.tmp_dir, "profile")
+
+        with self.assertLogs(level="WARNING"):
+            ret = main.main(["--profile", profile_path, src_dir, "-o", "cpp=" + os.path.join(self.tmp_dir, "output")],
+                            out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertFalse(os.path.exists(profile_path))
+        with open(profile_path + ".collapsed") as f:
+            self.assertEqual(f.read(), "")
@@ -1,7 +1,8 @@
 import re
 from unittest import TestCase
 
-from doxyqml.qmlclass import QmlFunction, QmlArgument, QmlProperty
+from doxyqml.qmlclass import QmlClass, QmlFunction, QmlArgument, QmlProperty, QmlComponent, QmlAttribute, \
+    QmlSignal
 
 
 class QmlFunctionTestCase(TestCase):
@@ -54,6 +55,66 @@ class QmlFunctionTestCase(TestCase):
         expected_doc = re.sub(r"([@\\])return type:\w+", r"\1return", expected_doc)
         self.assertMultiLineEqual(fcn.doc, expected_doc)
 
+    def test_post_process_doc_unknown_argument(self):
+        fcn = QmlFunction()
+        fcn.name = "foo"
+        fcn.args = [QmlArgument("known")]
+        fcn.doc = "/** @param type:int unknown Bad @param type:int known Good */"
+
+        with self.assertLogs(level="WARNING") as logs:
+            fcn.post_process_doc()
+
+        self.assertEqual(fcn.args[0].type, "int")
+        self.assertEqual(fcn.doc, "/** @param unknown Bad @param known Good */")
+        self.assertEqual(logs.output, ["WARNING:root:In function foo(): Unknown argument unknown"])
+
+    def test_post_process_doc_first_return_wins(self):
+        fcn = QmlFunction()
+        fcn.doc = "/** @return type:int first\n@returns type:string second */"
+
+        fcn.post_process_doc()
+
+        self.assertEqual(fcn.type, "int")
+        self.assertEqual(fcn.doc, "/** @return first\n@returns type:string second */")
+
+    def test_rendering_keeps_function(self):
+        fcn = QmlFunction()
+        fcn.name = "create"
+        fcn.args = [QmlArgument("name")]
+        fcn.doc = "/** @param type:string name The name @return type:User The user */"
+
+        expected = "/** @param name The name @return The user */\nUser create(string name);"
+        self.assertEqual(str(fcn), expected)
+        self.assertEqual(str(fcn), expected)
+        self.assertEqual(fcn.type, "void")
+        self.assertEqual(fcn.args[0].type, "")
+        self.assertEqual(fcn.doc, "/** @param type:string name The name @return type:User The user */")
+
+
+class QmlSignalTestCase(TestCase):
+    def test_post_process_doc(self):
+        signal = QmlSignal()
+        signal.args = [QmlArgument("user"), QmlArgument("count")]
+        signal.args[0].type = "var"
+        signal.args[1].type = "int"
+        signal.doc = "/**\n * @param type:User user The user\n * @param count The count\n */"
+
+        signal.post_process_doc()
+
+        self.assertEqual(signal.args[0].type, "User")
+        self.assertEqual(signal.args[1].type, "int")
+        self.assertEqual(signal.doc, "/**\n * @param user The user\n * @param count The count\n */")
+
+    def test_rendering_keeps_signal(self):
+        signal = QmlSignal()
+        signal.name = "created"
+        signal.args = [QmlArgument("user")]
+        signal.doc = "/// @param type:User user The user"
+
+        self.assertEqual(str(signal), "/// @param user The user\nQ_SIGNALS: void created(User user); public:")
+        self.assertEqual(signal.args[0].type, "")
+        self.assertEqual(signal.doc, "/// @param type:User user The user")
+
 
 class QmlPropertyTestCase(TestCase):
     def test_property_type(self):
@@ -83,4 +144,80 @@ class QmlPropertyTestCase(TestCase):
         prop.is_default = True
 
         self.assertEqual(str(prop),
-                         "/// Children\n" + QmlProperty.DEFAULT_PROPERTY_COMMENT + "\nQ_PROPERTY(list<Item>  READ dummyGetter__ignore)")
+                         "/// Children\n" + QmlProperty.DEFAULT_PROPERTY_COMMENT
+                         + "\nQ_PROPERTY(list<Item>  READ dummyGetter__ignore)")
+
+    def test_rendering_keeps_property(self):
+        prop = QmlProperty()
+        prop.name = "user"
+        prop.doc = "/// type:User The current user"
+        prop.type = "alias"
+
+        expected = "/// The current user\nQ_PROPERTY(User user READ dummyGetter_user_ignore)"
+        self.assertEqual(str(prop), expected)
+        self.assertEqual(str(prop), expected)
+        self.assertEqual(prop.type, "alias")
+
+
+class QmlComponentTestCase(TestCase):
+    def test_elements_by_type(self):
+        component = QmlComponent("Item")
+        prop1 = QmlProperty()
+        prop2 = QmlProperty()
+        fcn = QmlFunction()
+        component.add_element("/// comment")
+        component.add_element(prop1)
+        component.add_element(fcn)
+        component.add_element(prop2)
+
+        self.assertEqual(component.elements, ["/// comment", prop1, fcn, prop2])
+        self.assertEqual(component.get_properties(), [prop1, prop2])
+        self.assertEqual(component.get_functions(), [fcn])
+        self.assertEqual(component.get_signals(), [])
+
+    def test_component_id(self):
+        component = QmlComponent("Item")
+        self.assertIsNone(component.get_component_id())
+
+        for name, value in ("width", "12"), ("id", "first"), ("id", "second"):
+            attr = QmlAttribute()
+            attr.name = name
+            attr.value = value
+            component.add_element(attr)
+
+        self.assertEqual(component.get_component_id(), "first")
+        self.assertEqual(len(component.get_attributes()), 3)
+
+    def test_no_instance_dict(self):
+        # Model classes use __slots__ to stay small when many are kept alive
+        for obj in QmlComponent("Item"), QmlProperty(), QmlFunction(), QmlArgument("x"), QmlAttribute():
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+
+class QmlClassTestCase(TestCase):
+    def test_resolve_type_name(self):
+        cls = QmlClass("Foo")
+        cls.add_import("import QtQuick.Controls 2.15 as QQC2")
+        cls.add_import("import org.kde.kirigami 2.20 as Kirigami;")
+
+        self.assertEqual(cls.resolve_type_name("QQC2.Button"), "QtQuick.Controls.Button")
+        self.assertEqual(cls.resolve_type_name("Kirigami.Page"), "org.kde.kirigami.Page")
+        # Only qualified if their module is imported, except Item and QtObject
+        self.assertEqual(cls.resolve_type_name("Rectangle"), "Rectangle")
+        self.assertEqual(cls.resolve_type_name("QtObject"), "QtQml.QtObject")
+        self.assertEqual(cls.resolve_type_name("Item"), "QtQuick.Item")
+        self.assertEqual(cls.resolve_type_name("Button"), "Button")
+        cls.add_import("import QtQuick 2.15")
+        self.assertEqual(cls.resolve_type_name("Rectangle"), "QtQuick.Rectangle")
+        self.assertEqual(cls.resolve_type_name("ColumnLayout"), "ColumnLayout")
+        # Only the exact qualifier is an alias
+        self.assertEqual(cls.resolve_type_name("MyQQC2.Button"), "MyQQC2.Button")
+        self.assertEqual(cls.resolve_type_name("Other.QQC2.Button"), "Other.QQC2.Button")
+
+    def test_rendering_keeps_base_name(self):
+        cls = QmlClass("Foo")
+        cls.add_import("import QtQuick.Controls 2.15 as QQC2")
+        cls.base_name = "QQC2.Button"
+
+        self.assertIn("class Foo : public QtQuick.Controls.Button {", str(cls))
+        self.assertEqual(cls.base_name, "QQC2.Button")
@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from doxyqml import main
+from doxyqml.qmlclass import QmlClass
+from doxyqml.qmldir import QmldirEntry, parse_qmldir
+
+
+QMLDIR = """module Foo.Bar
+# A comment
+plugin foobarplugin
+internal Detail private/Detail.qml
+Button 1.0 Button.qml
+Button 2.1 Button.qml
+singleton Style 1.2 Style.qml
+Legacy 1.0 Legacy.qml
+internal Legacy Legacy.qml
+"""
+
+
+class QmldirTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_parse(self):
+        qmldir = parse_qmldir(QMLDIR, "/some/dir/qmldir")
+
+        self.assertEqual(qmldir.module, "Foo.Bar")
+        self.assertEqual(qmldir.entries[0], QmldirEntry("Detail", None, "private/Detail.qml", True, False))
+        self.assertEqual(qmldir.entries[3], QmldirEntry("Style", "1.2", "Style.qml", False, True))
+        self.assertEqual([(x.name, x.version) for x in qmldir.get_public_entries()],
+                         [("Button", "1.0"), ("Style", "1.2")])
+        self.assertEqual(qmldir.find_entry("/some/dir/./Button.qml").version, "1.0")
+        self.assertTrue(qmldir.find_entry("/some/dir/Legacy.qml").internal)
+        self.assertIsNone(qmldir.find_entry("/some/dir/Other.qml"))
+
+    def test_find_classname(self):
+        self.write("qmldir", QMLDIR)
+        style = self.write("Style.qml", "Item {}\n")
+        detail = self.write("private/Detail.qml", "Item {}\n")
+
+        self.assertEqual(main.find_classname(style, ["NS"]), ("NS.Foo.Bar.Style", "1.2", "Foo.Bar", True))
+        self.assertEqual(main.find_classname(detail), (None, None, None, False))
+
+    def test_module_mode(self):
+        qmldir = self.write("module/qmldir", QMLDIR)
+        for name in "Button.qml", "Style.qml", "Legacy.qml", "private/Detail.qml":
+            self.write(os.path.join("module", name), "pragma Singleton\nItem {}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        ret = main.main(["--qmldir", qmldir, "-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["Button.qml.cpp", "Style.qml.cpp"])
+        with open(os.path.join(output_dir, "Style.qml.cpp")) as f:
+            text = f.read()
+        self.assertIn("namespace Foo::Bar {", text)
+        self.assertIn("/** @version 1.2 */", text)
+        self.assertIn("class Style : public QtQuick.Item {", text)
+        # Both the pragma and the qmldir file declare it as a singleton
+        self.assertEqual(text.count(QmlClass.SINGLETON_COMMENT), 1)
+
+    def test_singleton_without_pragma(self):
+        qmldir = self.write("module/qmldir", QMLDIR)
+        self.write("module/Button.qml", "Item {}\n")
+        self.write("module/Style.qml", "/// The style\nItem {}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        ret = main.main(["--qmldir", qmldir, "-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        with open(os.path.join(output_dir, "Style.qml.cpp")) as f:
+            self.assertEqual(f.read().count(QmlClass.SINGLETON_COMMENT), 1)
+        with open(os.path.join(output_dir, "Button.qml.cpp")) as f:
+            self.assertNotIn(QmlClass.SINGLETON_COMMENT, f.read())
@@ -184,3 +184,156 @@ class QmlParserTestCase(TestCase):
         self.assertEqual(len(functions), 1)
         self.assertEqual(functions[0].args[0].name, "aspect")
         self.assertEqual(functions[0].args[0].default_value, "4.0/3.0")
+
+    def test_keep_going(self):
+        src = """Item {
+                     property int
+                     function foo() { }
+                     property string ok
+                     function bar(a b) {
+                         return a;
+                     }
+                     property string after
+                 }"""
+        lexer = Lexer(src)
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        errors = []
+        qmlparser.parse(lexer.tokens, qmlclass, errors=errors)
+
+        self.assertEqual([x.token.value for x in errors], ["function", "b"])
+        self.assertEqual([x.name for x in qmlclass.get_properties()], ["ok", "after"])
+
+    def test_unexpected_end_of_file(self):
+        lexer = Lexer("Item {\n    property int")
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        with self.assertRaises(qmlparser.QmlParserError) as cm:
+            qmlparser.parse(lexer.tokens, qmlclass)
+        self.assertEqual(cm.exception.token.value, "int")
+
+    def test_lazy_components(self):
+        src = """Item {
+                     Row {
+                         width: 12
+                         property int count
+                         onClicked: { foo(); }
+                         /// The label
+                         Text {
+                             id: label
+                         }
+                     }
+                 }"""
+        lexer = Lexer(src)
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        qmlparser.parse(lexer.tokens, qmlclass, lazy_components=True)
+
+        row = qmlclass.get_components()[0]
+        self.assertEqual(len(row.elements), 1)
+        text = row.get_components()[0]
+        self.assertEqual(text.get_component_id(), "label")
+        self.assertEqual(text.comment, "/// The label")
+
+        # Only the tokens of the body are kept until it is parsed
+        body_tokens = row._body_parser.args[0]
+        self.assertEqual((body_tokens[0].value, body_tokens[-1].value), ("{", "}"))
+        self.assertLess(len(body_tokens), len(lexer.tokens) - 3)
+
+        self.assertEqual([x.name for x in row.get_properties()], ["count"])
+        self.assertIsNone(row._body_parser)
+        self.assertEqual([x.name for x in row.get_attributes()], ["width", "onClicked"])
+        self.assertEqual(row.get_components()[0].get_component_id(), "label")
+
+    def test_lazy_components_declarations(self):
+        src = """Item {
+                     Row {
+                         enum Mode { A, B }
+                         signal toggled(bool on /* The new state */)
+                         function reset(options = {}, count) { return Text; }
+                         /// The label
+                         Text {
+                             id: label
+                         }
+                     }
+                 }"""
+        lexer = Lexer(src)
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        qmlparser.parse(lexer.tokens, qmlclass, lazy_components=True)
+
+        row = qmlclass.get_components()[0]
+        text = row.get_components()[0]
+        self.assertEqual(text.get_component_id(), "label")
+        self.assertEqual(text.comment, "/// The label")
+        self.assertIsNotNone(row._body_parser)
+
+        self.assertEqual([x.name for x in row.get_functions()], ["reset"])
+        self.assertEqual([x.name for x in row.get_signals()], ["toggled"])
+
+    def test_lazy_components_unterminated_block(self):
+        lexer = Lexer("Item {\n    Row {\n        onClicked: {\n")
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        with self.assertRaises(qmlparser.QmlParserError):
+            qmlparser.parse(lexer.tokens, qmlclass, lazy_components=True)
+
+    def test_keyword_whitespace(self):
+        src = "Item {\n    default\t  property int v1\n}"
+        lexer = Lexer(src)
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        qmlparser.parse(lexer.tokens, qmlclass)
+
+        properties = qmlclass.get_properties()
+        self.assertEqual(properties[0].name, "v1")
+        self.assertTrue(properties[0].is_default)
+
+    def test_register_keyword(self):
+        def parse_private_signal(reader, keyword):
+            obj = qmlparser.parse_signal(reader, keyword)
+            obj.name = "_" + obj.name
+            return obj
+
+        self.addCleanup(qmlparser.register_keyword, "signal", qmlparser.parse_signal)
+        qmlparser.register_keyword("signal", parse_private_signal)
+        lexer = Lexer("Item {\n    signal foo()\n    signal bar()\n}")
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        qmlparser.parse(lexer.tokens, qmlclass)
+
+        self.assertEqual(qmlclass.get_signals(), [])
+
+    def test_signal_without_arguments_before_comment(self):
+        src = """Item {
+                     signal foo
+                     /// bar doc
+                     property int bar
+                 }"""
+        lexer = Lexer(src)
+        lexer.tokenize()
+        qmlclass = QmlClass("Foo")
+        qmlparser.parse(lexer.tokens, qmlclass)
+
+        self.assertEqual(qmlclass.get_signals()[0].args, [])
+        self.assertEqual(qmlclass.get_properties()[0].doc, "/// bar doc")
+
+
+class TokenReaderTestCase(TestCase):
+    def test_comments_and_blocks(self):
+        lexer = Lexer("a /* 1 */ // 2\n{ b { c } /* 3 */ } {")
+        lexer.tokenize()
+        reader = qmlparser.TokenReader(lexer.tokens)
+
+        self.assertEqual(reader.token_index.comment_ends, {1: 3, 2: 3, 8: 9})
+        self.assertEqual(reader.token_index.block_ends, {3: 9, 5: 7})
+
+        self.assertEqual(reader.consume_wo_comments().value, "a")
+        self.assertEqual(reader.peek_wo_comments().value, "{")
+        self.assertEqual(reader.idx, 1)
+        self.assertEqual(reader.consume_wo_comments().value, "{")
+        qmlparser.skip_block(reader)
+        self.assertEqual(reader.consume_wo_comments().value, "{")
+        with self.assertRaises(qmlparser.QmlParserError):
+            qmlparser.skip_block(reader)
+        self.assertTrue(reader.at_end())
@@ -0,0 +1,151 @@
+"""
+Checks that the time taken by the lexer, the parser and the other steps of a
+conversion grows linearly with the size of their input: each case is timed
+on an input and on an input FACTOR times larger, and fails if the time grows
+more than FACTOR * SLACK times. A quadratic step grows FACTOR ** 2 times.
+"""
+import gc
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from doxyqml import main, qmlparser
+from doxyqml.lexer import Lexer
+from doxyqml.qmlclass import QmlClass
+
+FACTOR = 8
+SLACK = 2
+# Each measure calls the function until this duration is reached, and keeps
+# the best of REPEAT measures
+MIN_DURATION = 0.005
+REPEAT = 3
+# Timings are noisy on loaded machines: a case only fails if all attempts
+# fail
+ATTEMPTS = 3
+
+
+def measure(function, arg):
+    """Returns the best time of one call of function(arg)"""
+    best = None
+    for _ in range(REPEAT):
+        number = 0
+        start = time.perf_counter()
+        while True:
+            function(arg)
+            number += 1
+            duration = time.perf_counter() - start
+            if duration >= MIN_DURATION:
+                break
+        if best is None or duration / number < best:
+            best = duration / number
+    return best
+
+
+def tokenize(text):
+    lexer = Lexer(text)
+    lexer.tokenize()
+    return lexer.tokens
+
+
+def prepare_fixup(text):
+    lexer = Lexer(text)
+    lexer.scan_tokens()
+    return lexer, lexer.tokens
+
+
+def fixup(lexer_and_tokens):
+    lexer, tokens = lexer_and_tokens
+    lexer.tokens = list(tokens)
+    lexer.fixup_tokens()
+
+
+def parse(tokens):
+    qml_class = QmlClass("Foo")
+    qmlparser.parse(tokens, qml_class)
+    return qml_class
+
+
+def parse_with_errors(tokens):
+    qml_class = QmlClass("Foo")
+    qmlparser.parse(tokens, qml_class, errors=[])
+
+
+def component(members):
+    return "Item {\n" + "".join(members) + "}\n"
+
+
+class ScalingTestCase(TestCase):
+    def assert_linear(self, function, make_input, size):
+        small = make_input(size)
+        large = make_input(size * FACTOR)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(ATTEMPTS):
+                ratio = measure(function, large) / measure(function, small)
+                if ratio < FACTOR * SLACK:
+                    return
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self.fail("Time grew %.1f times for an input %d times larger" % (ratio, FACTOR))
+
+    def test_lexer_comments(self):
+        self.assert_linear(tokenize, lambda n: component(["    // Comment\n    /* Comment */ x: 1\n"] * n), 100)
+
+    def test_lexer_inline_comments(self):
+        self.assert_linear(tokenize, lambda n: component(["    property int a ///< Doc\n"] * n), 200)
+
+    def test_fixup_comments(self):
+        # Scanning hides the cost of fixups on small inputs
+        self.assert_linear(fixup, lambda n: prepare_fixup(component(["    // Comment\n    x: 1\n"] * n)), 1000)
+
+    def test_fixup_inline_comments(self):
+        self.assert_linear(fixup, lambda n: prepare_fixup(component(["    property int a ///< Doc\n"] * n)), 1000)
+
+    def test_lexer_long_line(self):
+        self.assert_linear(tokenize, lambda n: "Item { x: [" + "1, " * n + "] }\n", 1000)
+
+    def test_lexer_unterminated(self):
+        self.assert_linear(tokenize, lambda n: component(['    x: a"b /* c\n'] * n), 200)
+
+    def test_parser_properties(self):
+        self.assert_linear(parse, lambda n: tokenize(component(["    /// Doc\n    property int a\n"] * n)), 200)
+
+    def test_parser_nesting_depth(self):
+        # The parser recurses for each nesting level, which limits the depth
+        self.assert_linear(parse, lambda n: tokenize("Item {\n" + "Item {\n    property int a\n" * n + "}\n" * n),
+                           15)
+
+    def test_parser_errors(self):
+        self.assert_linear(parse_with_errors, lambda n: tokenize(component(["    property int\n    Foo {\n"] * n)),
+                           100)
+
+    def test_file_length(self):
+        def convert(text):
+            return str(parse(tokenize(text)))
+
+        members = ["    /// Doc\n    property int a\n", "    /** @param type:int x */\n    function f(x) {}\n",
+                   "    signal s(int x)\n", "    Rectangle { id: r; width: 2 }\n"]
+        self.assert_linear(convert, lambda n: component(members * n), 50)
+
+    def test_error_location(self):
+        self.assert_linear(lambda text: main.info_for_error_at(text, len(text) - 1),
+                           lambda n: "Item {\n" + "    x: 1\n" * n + "}", 1000)
+
+    def test_find_classname(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+
+        def make_module(count):
+            directory = os.path.join(tmp_dir, str(count))
+            os.makedirs(directory)
+            with open(os.path.join(directory, "qmldir"), "w") as f:
+                f.write("module Foo\n")
+                for idx in range(count):
+                    f.write("Type%d 1.0 Type%d.qml\n" % (idx, idx))
+            return os.path.join(directory, "Type%d.qml" % (count - 1))
+
+        self.assert_linear(main.find_classname, make_module, 100)
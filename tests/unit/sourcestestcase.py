@@ -0,0 +1,121 @@
+import codecs
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from unittest import TestCase, mock
+
+from doxyqml import main
+from doxyqml.sources import TarSource, decode_qml, is_source_path, list_source_files, open_source
+
+
+QMLDIR = """module Foo
+Button 1.0 Button.qml
+internal Detail Detail.qml
+"""
+
+FILES = {
+    "qml/qmldir": QMLDIR,
+    "qml/Button.qml": "Item {}\n",
+    "qml/Detail.qml": "Item {}\n",
+    "qml/sub/Label.qml": "Text {}\n",
+    "README": "Not QML\n",
+}
+
+
+class SourcesTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def list_files(self, path, include_internal=False):
+        with open_source(path) as source:
+            return [(name, class_info) for _, name, class_info, _ in list_source_files(source, None, include_internal)]
+
+    def test_zip(self):
+        path = os.path.join(self.tmp_dir, "qml.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, text in FILES.items():
+                archive.writestr(name, text)
+
+        self.assertTrue(is_source_path(path))
+        self.assertEqual(self.list_files(path), [
+            ("qml/Button.qml", ("Foo.Button", "1.0", "Foo", False)),
+            ("qml/sub/Label.qml", ("Foo.Label", None, "Foo", False)),
+        ])
+        self.assertEqual([x[0] for x in self.list_files(path, include_internal=True)],
+                         ["qml/Button.qml", "qml/Detail.qml", "qml/sub/Label.qml"])
+
+    def test_tar(self):
+        path = os.path.join(self.tmp_dir, "qml.tar.gz")
+        with tarfile.open(path, "w:gz") as archive:
+            for name, text in FILES.items():
+                data = text.encode("utf-8")
+                info = tarfile.TarInfo("./" + name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        # Members are read in archive order
+        with mock.patch.object(TarSource, "read", side_effect=AssertionError):
+            self.assertEqual([x[0] for x in self.list_files(path)], ["qml/Button.qml", "qml/sub/Label.qml"])
+
+        # Each QML member is yielded as soon as it is read, after the qmldir
+        # files
+        with open_source(path) as source:
+            with mock.patch.object(source.archive, "extractfile", wraps=source.archive.extractfile) as extractfile:
+                files = list_source_files(source)
+                self.assertEqual(next(files)[1], "qml/Button.qml")
+                self.assertEqual([x[0][0].name for x in extractfile.call_args_list],
+                                 ["./qml/qmldir", "./qml/Button.qml"])
+
+    def test_qrc(self):
+        for name, text in FILES.items():
+            file_path = os.path.join(self.tmp_dir, "src", name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as f:
+                f.write(text)
+        path = os.path.join(self.tmp_dir, "src", "qml.qrc")
+        with open(path, "w") as f:
+            f.write("""<RCC>
+                <qresource prefix="/Foo">
+                    <file alias="qmldir">qml/qmldir</file>
+                    <file alias="Button.qml">qml/Button.qml</file>
+                    <file alias="Detail.qml">qml/Detail.qml</file>
+                </qresource>
+                <qresource>
+                    <file>qml/sub/Label.qml</file>
+                </qresource>
+            </RCC>""")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        ret = main.main([path, "-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["Foo", "qml"])
+        self.assertEqual(os.listdir(os.path.join(output_dir, "Foo")), ["Button.qml.cpp"])
+        with open(os.path.join(output_dir, "Foo", "Button.qml.cpp")) as f:
+            self.assertIn("/** @version 1.0 */", f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "src", "Foo")))
+
+    def test_unsafe_names(self):
+        path = os.path.join(self.tmp_dir, "qml.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name in "../../escaped.qml", "/absolute.qml", "C:/drive.qml", "a/../../parent.qml", "Safe.qml":
+                archive.writestr(name, "Item {}\n")
+        output_dir = os.path.join(self.tmp_dir, "out", "x")
+
+        with self.assertLogs(level="WARNING") as logs:
+            ret = main.main([path, "-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual(len(logs.output), 4)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["out", "qml.zip"])
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir, "out")), ["x"])
+        self.assertEqual(os.listdir(output_dir), ["Safe.qml.cpp"])
+
+    def test_decode(self):
+        self.assertEqual(decode_qml(codecs.BOM_UTF8 + "Item {}\r\n\r".encode("utf-8")), "Item {}\n\n")
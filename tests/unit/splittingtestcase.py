@@ -0,0 +1,153 @@
+import glob
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from doxyqml import main, qmlparser, splitting
+from doxyqml.formats import FORMATS
+from doxyqml.lexer import Lexer
+from doxyqml.modelcache import restore_class
+from doxyqml.qmlclass import QmlClass
+
+
+HEADER = """import QtQuick 2.0
+/// The class
+Item {
+    id: root
+"""
+
+MEMBERS = [
+    "    /// Doc\n    property int a%d\n",
+    "    /**\n     * @param type:int x\n     */\n    function f%d(x) {\n        return '}' + x;\n    }\n",
+    "    signal s%d(int x) ///< Inline doc\n",
+    "    enum E%d { A, B /**< b */ }\n",
+    "    Rectangle {\n        id: r%d\n        width: 2 // }\n        Text { text: \"{\" }\n    }\n",
+    "    component C%d: Text {\n        property int size\n    }\n",
+]
+
+FOOTER = "}\n// footer\n"
+
+FUNCTIONAL_DIR = os.path.join(os.path.dirname(__file__), "..", "functional")
+
+
+def generate(count):
+    return HEADER + "".join(MEMBERS[x % len(MEMBERS)] % x for x in range(count)) + FOOTER
+
+
+def render(qml_class):
+    return [FORMATS[x].render(qml_class) for x in sorted(FORMATS)]
+
+
+def convert(text):
+    lexer = Lexer(text)
+    lexer.tokenize()
+    qml_class = QmlClass("Foo")
+    qmlparser.parse(lexer.tokens, qml_class, lazy_components=True)
+    return render(qml_class)
+
+
+def convert_in_parts(text, count):
+    """Returns the renderings of `text` parsed in parts, or None"""
+    parts = splitting.split(text, count)
+    contents = [splitting.parse_part(x, idx == 0, idx == len(parts) - 1) for idx, x in enumerate(parts)]
+    if None in contents:
+        return None
+    qml_class = QmlClass("Foo")
+    restore_class(qml_class, splitting.merge_parts(contents))
+    return render(qml_class)
+
+
+class FindSplitPointsTestCase(TestCase):
+    def test_top_level_elements(self):
+        text = generate(60)
+        points = splitting.find_split_points(text, 4)
+        self.assertEqual(len(points), 3)
+        for point in points:
+            self.assertEqual(text[point - 2:point], "}\n")
+            line = text[point:text.index("\n", point)]
+            self.assertTrue(line.startswith("    ") and line[4].isalpha(), line)
+
+    def test_strings_and_comments(self):
+        text = "Item {\n    x: '}'\n    // }\n    /* } */\n    Foo {\n    }\n    y: 1\n}\n"
+        self.assertEqual(splitting.find_split_points(text, 2), [text.index("    y")])
+        # Only the closing braces of top-level elements are split points
+        self.assertEqual(splitting.find_split_points("Item {\n    Foo {\n        Bar {\n        }\n"
+                                                     "        x: 1\n    }\n}\n", 2), [])
+
+    def test_unterminated(self):
+        text = "Item {\n    x: 'a\n    Foo {\n    }\n    y: 1\n}\n"
+        self.assertEqual(splitting.find_split_points(text, 2), [])
+
+
+class ParsePartTestCase(TestCase):
+    def test_same_output(self):
+        texts = [generate(60)]
+        for path in glob.glob(os.path.join(FUNCTIONAL_DIR, "*", "input", "**", "*.qml"), recursive=True):
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+        split_count = 0
+        # Some inputs document unknown arguments
+        with self.assertLogs(level="WARNING"):
+            for text in texts:
+                expected = convert(text)
+                for count in 2, 3, 8, 50:
+                    renderings = convert_in_parts(text, count)
+                    if renderings is not None:
+                        self.assertEqual(renderings, expected)
+                        split_count += 1
+        self.assertGreaterEqual(split_count, 4)
+
+    def test_cannot_parse_alone(self):
+        for text in [
+                # The comment would document the first element of the next part
+                "    Foo {\n    }\n    /// Doc\n",
+                "    /// Doc\n    {\n    }\n",
+                # The attribute value is the block end
+                "    Foo {\n        x:\n    }\n",
+                # The string may end in the next part
+                "    Foo {\n    }\n    x: 'a\n    Bar {\n    }\n",
+                # The part must end at the top level
+                "    Foo {\n    }\n    Bar {\n",
+                "    }\n    Foo {\n    }\n",
+                ]:
+            self.assertIsNone(splitting.parse_part(text, False, False), text)
+        self.assertIsNotNone(splitting.parse_part("    /// Doc\n    Foo {\n    }\n", False, False))
+
+    def test_parse_errors(self):
+        self.assertIsNone(splitting.parse_part("    property int\n    Foo {\n    }\n", False, False))
+        self.assertIsNone(splitting.parse_part("Item\nItem {\n    Foo {\n    }\n", True, False))
+        self.assertIsNone(splitting.parse_part("    Foo {\n    }\n}\nBar\n", False, True))
+
+
+class SplitterTestCase(TestCase):
+    def test_parse(self):
+        text = generate(200)
+        splitter = splitting.Splitter(2, min_size=0)
+        self.addCleanup(splitter.close)
+        qml_class = QmlClass("Foo")
+        restore_class(qml_class, splitter.parse(text))
+        self.assertEqual(render(qml_class), convert(text))
+
+        splitter = splitting.Splitter(2)
+        self.addCleanup(splitter.close)
+        self.assertIsNone(splitter.parse(text))
+
+    def test_main(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "Foo.qml")
+        with open(path, "w") as f:
+            f.write(generate(200))
+
+        outputs = []
+        for options in [], ["--split-jobs", "2"]:
+            out = io.TextIOWrapper(io.BytesIO())
+            with mock.patch.object(splitting, "MIN_SIZE", 0), \
+                    mock.patch.object(splitting, "merge_parts", wraps=splitting.merge_parts) as merge_parts:
+                self.assertEqual(main.main([path] + options, out=out), 0)
+            self.assertEqual(merge_parts.called, bool(options))
+            out.flush()
+            outputs.append(out.buffer.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from doxyqml import main, tracing
+from doxyqml.lexer import Lexer
+
+
+class TracingTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.events = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_no_tracer(self):
+        self.assertFalse(tracing.is_tracing())
+        self.assertIsNone(tracing.start(tracing.PARSE))
+        tracing.finish(None)
+
+    def test_use_tracer(self):
+        with tracing.use_tracer(self.events.append), tracing.current_file("Foo.qml"):
+            self.assertTrue(tracing.is_tracing())
+            Lexer("Item {}\n").tokenize()
+        Lexer("Item {}\n").tokenize()
+
+        self.assertEqual([x.phase for x in self.events], [tracing.TOKENIZE, tracing.FIXUP_TOKENS])
+        event = self.events[0]
+        self.assertEqual(event.path, "Foo.qml")
+        self.assertEqual(event.size, 8)
+        self.assertEqual(event.token_count, 3)
+        self.assertGreaterEqual(event.duration, 0)
+
+    def test_phases(self):
+        path = self.write("Foo.qml", "Item {\n    property int count\n}\n")
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        with tracing.use_tracer(self.events.append):
+            ret = main.main([path, "-o", "cpp=" + output_dir, "-o", "json=" + output_dir],
+                            out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        self.assertEqual([x.phase for x in self.events], [
+            tracing.FIND_CLASSNAME, tracing.READ, tracing.TOKENIZE, tracing.FIXUP_TOKENS, tracing.PARSE,
+            tracing.RENDER, tracing.RENDER])
+        self.assertEqual(set(x.path for x in self.events), {path})
+        self.assertEqual(self.events[0].size, None)
+        self.assertEqual(self.events[1].size, os.path.getsize(path))
+        self.assertEqual(self.events[4].token_count, self.events[2].token_count)
+
+    def test_worker_processes(self):
+        paths = [self.write("Type%d.qml" % x, "Item {}\n") for x in range(3)]
+        output_dir = os.path.join(self.tmp_dir, "output")
+
+        with tracing.use_tracer(self.events.append):
+            ret = main.main(["-j", "2"] + paths + ["-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        for path in paths:
+            self.assertEqual(len([x for x in self.events if x.path == path]), 6)
+
+    def test_tracers_not_run_in_workers(self):
+        paths = [self.write("Type%d.qml" % x, "Item {}\n") for x in range(3)]
+        output_dir = os.path.join(self.tmp_dir, "output")
+        log_path = os.path.join(self.tmp_dir, "log")
+
+        def tracer(event):
+            # Shared with forked worker processes, unlike a list
+            with open(log_path, "a") as f:
+                f.write("%d %s\n" % (os.getpid(), event.phase))
+
+        with tracing.use_tracer(tracer):
+            ret = main.main(["-j", "2"] + paths + ["-o", "cpp=" + output_dir], out=io.TextIOWrapper(io.BytesIO()))
+
+        self.assertEqual(ret, 0)
+        with open(log_path) as f:
+            lines = [x.split() for x in f]
+        self.assertEqual(set(x[0] for x in lines), {str(os.getpid())})
+        self.assertEqual(len([x for x in lines if x[1] == tracing.PARSE]), len(paths))